@@ -1,25 +1,47 @@
 """FastAPI entrypoint for the tokenization action."""
 from __future__ import annotations
 
+import asyncio
+import hmac
+import json
 import logging
-from typing import List, Optional
+import os
+from typing import AsyncIterator, Iterator, List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
+from .detokenize import Detokenizer
 from .mcl_consumer import MetadataChangeLogConsumer
+from .progress import Subscription
 from .run_manager import RunManager
 
 LOGGER = logging.getLogger(__name__)
+SSE_POLL_SECONDS = 0.25
+SSE_KEEPALIVE_SECONDS = 15.0
 
 app = FastAPI(title="DataHub Tokenization Action", version="0.1.0")
 run_manager = RunManager()
 consumer = MetadataChangeLogConsumer(run_manager)
+detokenizer = Detokenizer.from_env()
 
 
 class TriggerRequest(BaseModel):
     dataset: str = Field(..., description="Dataset URN to tokenize")
     columns: Optional[List[str]] = Field(None, description="Optional list of column names to tokenize")
+    dry_run: bool = Field(False, description="Estimate the run without touching data or metadata")
+
+
+class BatchTriggerRequest(BaseModel):
+    datasets: List[str] = Field(default_factory=list, description="Dataset URNs to tokenize")
+    container: Optional[str] = Field(None, description="Container URN whose datasets should all be tokenized")
+    columns: Optional[List[str]] = Field(None, description="Optional list of column names to tokenize")
+    dry_run: bool = Field(False, description="Estimate the runs without touching data or metadata")
+
+
+class DetokenizeRequest(BaseModel):
+    tokens: List[str] = Field(..., description="Tokens to resolve back to their original values")
 
 
 @app.on_event("startup")
@@ -33,6 +55,7 @@ async def shutdown_event() -> None:
     LOGGER.info("Stopping tokenization service")
     consumer.stop()
     consumer.join(timeout=5.0)
+    run_manager.close()
 
 
 @app.get("/healthz")
@@ -43,11 +66,128 @@ async def health() -> dict:
     }
 
 
+@app.get("/readyz")
+async def ready() -> dict:
+    backends = run_manager.backend_status()
+    backends["kafka"] = "ready" if consumer.connected else "cold"
+    return {
+        "status": "ok",
+        "backends": backends,
+    }
+
+
+# Runs and journal reads block, so these endpoints are plain ``def``: FastAPI runs
+# them in its threadpool and the event loop keeps serving health checks, progress
+# streams and higher-priority triggers meanwhile.
 @app.post("/trigger")
-async def trigger(request: TriggerRequest) -> dict:
+def trigger(request: TriggerRequest) -> dict:
     try:
-        result = run_manager.trigger(request.dataset, columns=request.columns)
+        result = run_manager.trigger(request.dataset, columns=request.columns, dry_run=request.dry_run)
         return result
     except Exception as exc:  # pragma: no cover - runtime safety
         LOGGER.exception("Manual trigger failed for %s", request.dataset)
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+@app.post("/trigger/batch")
+def trigger_batch(request: BatchTriggerRequest) -> dict:
+    if not request.datasets and not request.container:
+        raise HTTPException(status_code=400, detail="Provide datasets or a container")
+    try:
+        return run_manager.trigger_many(
+            request.datasets,
+            columns=request.columns,
+            container_urn=request.container,
+            dry_run=request.dry_run,
+        )
+    except Exception as exc:  # pragma: no cover - runtime safety
+        LOGGER.exception("Batch trigger failed")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@app.get("/runs/{run_id}")
+def run_status(run_id: str) -> dict:
+    status = run_manager.journal.run_status(run_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    return status
+
+
+@app.get("/runs")
+def run_history(dataset: str, limit: int = 20) -> dict:
+    return {"dataset": dataset, "runs": run_manager.journal.history(dataset, limit=limit)}
+
+
+@app.get("/lanes")
+async def lanes() -> dict:
+    return {"platforms": run_manager.lanes()}
+
+
+@app.get("/progress")
+async def progress(run_id: Optional[str] = None, dataset: Optional[str] = None) -> dict:
+    return {"runs": run_manager.progress.active(run_id=run_id, dataset=dataset)}
+
+
+@app.get("/progress/stream")
+async def progress_stream(run_id: Optional[str] = None, dataset: Optional[str] = None) -> StreamingResponse:
+    """Server-Sent Events feed of per-page progress, optionally for one run or dataset.
+
+    A stream filtered by ``run_id`` ends after the run's final event.
+    """
+
+    subscription = run_manager.progress.subscribe(run_id=run_id, dataset=dataset)
+    return StreamingResponse(
+        _progress_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _progress_events(subscription: Subscription) -> AsyncIterator[str]:
+    try:
+        for event in run_manager.progress.active(run_id=subscription.run_id, dataset=subscription.dataset):
+            yield _sse(event)
+        idle = 0.0
+        while True:
+            event = subscription.get_nowait()
+            if event is None:
+                await asyncio.sleep(SSE_POLL_SECONDS)
+                idle += SSE_POLL_SECONDS
+                if idle >= SSE_KEEPALIVE_SECONDS:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+                continue
+            idle = 0.0
+            yield _sse(event)
+            if subscription.run_id is not None and event.get("final"):
+                return
+    finally:
+        run_manager.progress.unsubscribe(subscription)
+
+
+def _sse(event: dict) -> str:
+    return f"event: progress\ndata: {json.dumps(event)}\n\n"
+
+
+@app.post("/detokenize")
+async def detokenize(request: DetokenizeRequest, authorization: Optional[str] = Header(None)) -> StreamingResponse:
+    """Stream ``{"token", "value"}`` lines as NDJSON; unknown tokens map to ``null``."""
+
+    _authorize_detokenize(authorization)
+    if len(request.tokens) > detokenizer.max_batch:
+        raise HTTPException(status_code=413, detail=f"At most {detokenizer.max_batch} tokens per request")
+    LOGGER.info("Detokenizing %d tokens", len(request.tokens))
+    return StreamingResponse(_detokenized_lines(request.tokens), media_type="application/x-ndjson")
+
+
+def _authorize_detokenize(authorization: Optional[str]) -> None:
+    expected = os.getenv("DETOKENIZE_API_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Detokenization is disabled")
+    if not authorization or not hmac.compare_digest(authorization, f"Bearer {expected}"):
+        raise HTTPException(status_code=401, detail="Invalid detokenization credentials")
+
+
+def _detokenized_lines(tokens: List[str]) -> Iterator[str]:
+    for chunk in detokenizer.iter_chunks(tokens):
+        yield "".join(json.dumps({"token": token, "value": value}) + "\n" for token, value in chunk)
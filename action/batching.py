@@ -0,0 +1,81 @@
+"""Adaptive page sizing for the tokenization loops."""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+
+@dataclass
+class BatchSizingConfig:
+    """Bounds and targets for :class:`AdaptiveBatchSizer`."""
+
+    minimum: int = 100
+    maximum: int = 10_000
+    target_seconds: float = 1.0
+    lock_target_seconds: Optional[float] = None
+    enabled: bool = True
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "BatchSizingConfig":
+        """Read ``<prefix>_BATCH_*`` settings, e.g. ``PG_BATCH_TARGET_MS``."""
+
+        lock_target_ms = os.getenv(f"{prefix}_BATCH_LOCK_TARGET_MS")
+        return cls(
+            minimum=int(os.getenv(f"{prefix}_BATCH_MIN", "100")),
+            maximum=int(os.getenv(f"{prefix}_BATCH_MAX", "10000")),
+            target_seconds=float(os.getenv(f"{prefix}_BATCH_TARGET_MS", "1000")) / 1000.0,
+            lock_target_seconds=float(lock_target_ms) / 1000.0 if lock_target_ms else None,
+            enabled=os.getenv(f"{prefix}_ADAPTIVE_BATCH", "true").lower() in {"1", "true", "yes"},
+        )
+
+
+class AdaptiveBatchSizer:
+    """Pick the next page size from the latency observed on the previous page.
+
+    The size is scaled so the next page should take ``target_seconds`` (and hold
+    row locks for no longer than ``lock_target_seconds``), limited to doubling
+    or halving per step and clamped to ``[minimum, maximum]``.
+    """
+
+    def __init__(self, initial: int, config: Optional[BatchSizingConfig] = None) -> None:
+        self.config = config or BatchSizingConfig(enabled=False)
+        self.size = self._clamp(initial) if self.config.enabled else initial
+        self.summary: Dict[str, int] = {}
+
+    def observe(self, rows: int, elapsed_seconds: float, lock_seconds: Optional[float] = None) -> int:
+        """Record a finished page and return the size to use for the next one."""
+
+        page = {"count": 1, "min": self.size, "max": self.size, "last": self.size}
+        self.summary = merge_batch_summaries([self.summary, page])
+        if not self.config.enabled or rows <= 0 or elapsed_seconds <= 0:
+            return self.size
+
+        desired = rows * self.config.target_seconds / elapsed_seconds
+        if self.config.lock_target_seconds and lock_seconds:
+            desired = min(desired, rows * self.config.lock_target_seconds / lock_seconds)
+        desired = max(self.size / 2.0, min(self.size * 2.0, desired))
+        self.size = self._clamp(int(desired))
+        return self.size
+
+    def _clamp(self, size: int) -> int:
+        return max(self.config.minimum, min(self.config.maximum, size))
+
+
+def merge_batch_summaries(summaries: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """Combine ``{"count", "min", "max", "last"}`` page-size summaries in page order."""
+
+    merged: Dict[str, int] = {}
+    for summary in summaries:
+        if not summary:
+            continue
+        if not merged:
+            merged = dict(summary)
+            continue
+        merged = {
+            "count": merged["count"] + summary["count"],
+            "min": min(merged["min"], summary["min"]),
+            "max": max(merged["max"], summary["max"]),
+            "last": summary["last"],
+        }
+    return merged
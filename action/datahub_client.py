@@ -3,7 +3,8 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Dict, Iterable, List, Optional, Sequence, Set
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 
 from datahub.emitter.mcp import MetadataChangeProposalWrapper
 from datahub.ingestion.graph.client import DataHubGraph
@@ -11,11 +12,15 @@ from datahub.ingestion.graph.config import DatahubClientConfig
 from datahub.metadata.schema_classes import (
     EditableDatasetPropertiesClass,
     GlobalTagsClass,
+    MetadataChangeProposalClass,
     TagAssociationClass,
 )
+from datahub.specific.dataset import DatasetPatchBuilder
 
 LOGGER = logging.getLogger(__name__)
 
+Proposal = Union[MetadataChangeProposalWrapper, MetadataChangeProposalClass]
+
 
 DATASET_QUERY = """
 query dataset($urn: String!) {
@@ -29,14 +34,14 @@ query dataset($urn: String!) {
     properties {
       name
       description
-    }
-    editableProperties {
-      description
       customProperties {
         key
         value
       }
     }
+    editableProperties {
+      description
+    }
     schemaMetadata {
       fields {
         fieldPath
@@ -78,14 +83,59 @@ query dataset($urn: String!) {
 """
 
 
+# Selections available to get_datasets(fields=...), keyed by top-level Dataset field.
+DATASET_FIELDS: Dict[str, str] = {
+    "name": "name",
+    "platform": "platform { urn name }",
+    "properties": "properties { name description customProperties { key value } }",
+    "editableProperties": "editableProperties { description }",
+    "schemaMetadata": (
+        "schemaMetadata { fields { fieldPath nativeDataType description globalTags { tags { tag { urn name } } } } }"
+    ),
+    "editableSchemaMetadata": (
+        "editableSchemaMetadata { editableSchemaFieldInfo { fieldPath globalTags { tags { tag { urn name } } } } }"
+    ),
+    "globalTags": "globalTags { tags { tag { urn name } } }",
+}
+
+DATASETS_QUERY_TEMPLATE = """
+query datasets($urns: [String!]!) {
+  entities(urns: $urns) {
+    urn
+    ... on Dataset {
+      %s
+    }
+  }
+}
+"""
+
+
+CONTAINER_DATASETS_QUERY = """
+query containerDatasets($input: SearchAcrossEntitiesInput!) {
+  searchAcrossEntities(input: $input) {
+    start
+    count
+    total
+    searchResults {
+      entity {
+        urn
+      }
+    }
+  }
+}
+"""
+
+
 class DataHubClient:
     """Thin wrapper around :class:`~datahub.ingestion.graph.client.DataHubGraph`."""
 
-    def __init__(self) -> None:
-        server = os.getenv("DATAHUB_GMS", "http://datahub-gms:8080").rstrip("/")
-        token = os.getenv("DATAHUB_TOKEN")
-        config = DatahubClientConfig(server=server, token=token)
-        self.graph = DataHubGraph(config)
+    def __init__(self, graph: Optional[DataHubGraph] = None) -> None:
+        if graph is None:
+            server = os.getenv("DATAHUB_GMS", "http://datahub-gms:8080").rstrip("/")
+            token = os.getenv("DATAHUB_TOKEN")
+            graph = DataHubGraph(DatahubClientConfig(server=server, token=token))
+        self.graph = graph
+        self.batch_size = int(os.getenv("DATAHUB_BATCH_SIZE", "100"))
 
     def get_dataset(self, urn: str) -> dict:
         response = self.graph.execute_graphql(DATASET_QUERY, variables={"urn": urn})
@@ -94,19 +144,93 @@ class DataHubClient:
             raise ValueError(f"Dataset {urn} not found")
         return dataset
 
+    def get_datasets(
+        self,
+        urns: Sequence[str],
+        fields: Optional[Sequence[str]] = None,
+        *,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, dict]:
+        """Fetch many datasets with one ``entities`` query per ``batch_size`` URNs.
+
+        ``fields`` limits the response to the named :data:`DATASET_FIELDS`
+        (all of them by default). ``batch_size`` defaults to
+        ``DATAHUB_BATCH_SIZE``. URNs that do not resolve to a dataset are left
+        out of the result.
+        """
+
+        query = _datasets_query(tuple(fields) if fields is not None else tuple(DATASET_FIELDS))
+        datasets: Dict[str, dict] = {}
+        unique = list(dict.fromkeys(urns))
+        batch_size = batch_size or self.batch_size
+        for start in range(0, len(unique), batch_size):
+            response = self.graph.execute_graphql(query, variables={"urns": unique[start : start + batch_size]})
+            for entity in (response or {}).get("entities") or []:
+                if entity and entity.get("urn"):
+                    datasets[entity["urn"]] = entity
+        return datasets
+
+    def list_container_datasets(self, container_urn: str, *, page_size: int = 100) -> List[str]:
+        """Return the URNs of every dataset inside ``container_urn`` (e.g. a schema)."""
+
+        urns: List[str] = []
+        start = 0
+        while True:
+            response = self.graph.execute_graphql(
+                CONTAINER_DATASETS_QUERY,
+                variables={
+                    "input": {
+                        "types": ["DATASET"],
+                        "query": "*",
+                        "start": start,
+                        "count": page_size,
+                        "orFilters": [{"and": [{"field": "container", "values": [container_urn]}]}],
+                    }
+                },
+            )
+            search = (response or {}).get("searchAcrossEntities") or {}
+            results = search.get("searchResults") or []
+            urns.extend(result["entity"]["urn"] for result in results if result.get("entity"))
+            start += len(results)
+            if not results or start >= int(search.get("total") or 0):
+                return urns
+
     def update_editable_properties(
         self,
         urn: str,
         description: Optional[str],
         custom_properties: Optional[Dict[str, str]] = None,
     ) -> None:
-        aspect = EditableDatasetPropertiesClass(
-            description=description,
-            customProperties=custom_properties or {},
-        )
-        proposal = MetadataChangeProposalWrapper(entityUrn=urn, aspect=aspect)
+        proposals: List[Proposal] = [self.editable_properties_proposal(urn, description)]
+        if custom_properties:
+            proposals.append(self.custom_properties_proposal(urn, set_properties=custom_properties))
+        self.graph.emit_mcps(proposals)
+
+    def editable_properties_proposal(self, urn: str, description: Optional[str]) -> MetadataChangeProposalWrapper:
+        aspect = EditableDatasetPropertiesClass(description=description)
         LOGGER.info("Updating editable dataset properties for %s", urn)
-        self.graph.emit_mcp(proposal)
+        return MetadataChangeProposalWrapper(entityUrn=urn, aspect=aspect)
+
+    def custom_properties_proposal(
+        self,
+        urn: str,
+        *,
+        set_properties: Optional[Dict[str, str]] = None,
+        remove: Iterable[str] = (),
+    ) -> MetadataChangeProposalClass:
+        """Patch individual ``datasetProperties`` custom properties.
+
+        Only the named keys change, so properties written by ingestion are left
+        alone.
+        """
+
+        patch = DatasetPatchBuilder(urn)
+        for key, value in (set_properties or {}).items():
+            patch.add_custom_property(key, value)
+        for key in remove:
+            patch.remove_custom_property(key)
+        (proposal,) = patch.build()
+        return proposal
 
     def update_dataset_tags(
         self,
@@ -116,6 +240,18 @@ class DataHubClient:
         remove: Iterable[str] = (),
         current_tags: Optional[Sequence[str]] = None,
     ) -> List[str]:
+        proposal, updated = self.dataset_tags_proposal(urn, add=add, remove=remove, current_tags=current_tags)
+        self.graph.emit_mcp(proposal)
+        return updated
+
+    def dataset_tags_proposal(
+        self,
+        urn: str,
+        *,
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+        current_tags: Optional[Sequence[str]] = None,
+    ) -> Tuple[MetadataChangeProposalWrapper, List[str]]:
         existing: Set[str]
         if current_tags is None:
             dataset = self.get_dataset(urn)
@@ -127,10 +263,16 @@ class DataHubClient:
         aspect = GlobalTagsClass(
             tags=[TagAssociationClass(tag=tag_urn) for tag_urn in sorted(updated)]
         )
-        proposal = MetadataChangeProposalWrapper(entityUrn=urn, aspect=aspect)
         LOGGER.info("Updating tags for %s: %s", urn, sorted(updated))
-        self.graph.emit_mcp(proposal)
-        return sorted(updated)
+        return MetadataChangeProposalWrapper(entityUrn=urn, aspect=aspect), sorted(updated)
+
+    def emit_batch(self, proposals: Sequence[Proposal]) -> None:
+        """Send ``proposals`` to GMS in a single batched ingest request."""
+
+        if not proposals:
+            return
+        LOGGER.info("Emitting %d metadata change proposals", len(proposals))
+        self.graph.emit_mcps(list(proposals))
 
     @staticmethod
     def extract_schema_fields(dataset: dict) -> List[dict]:
@@ -157,7 +299,7 @@ class DataHubClient:
 
     @staticmethod
     def extract_custom_properties(dataset: dict) -> Dict[str, str]:
-        props_list = dataset.get("editableProperties", {}).get("customProperties") or []
+        props_list = (dataset.get("properties") or {}).get("customProperties") or []
         properties: Dict[str, str] = {}
         for item in props_list:
             key = item.get("key")
@@ -177,3 +319,11 @@ class DataHubClient:
             if urn:
                 tag_urns.add(urn)
         return tag_urns
+
+
+@lru_cache(maxsize=32)
+def _datasets_query(fields: Tuple[str, ...]) -> str:
+    unknown = [field for field in fields if field not in DATASET_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown dataset fields: {', '.join(unknown)}")
+    return DATASETS_QUERY_TEMPLATE % "\n      ".join(DATASET_FIELDS[field] for field in fields)
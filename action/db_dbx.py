@@ -1,21 +1,38 @@
 """Databricks tokenization support (optional)."""
 from __future__ import annotations
 
+import base64
 import logging
+import math
 import os
+import time
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Sequence
+from typing import Dict, List, Optional, Sequence, Tuple
 
 try:
     from databricks import sql as dbsql
 except ImportError:  # pragma: no cover - the connector is optional
     dbsql = None
 
-from .token_logic import tokenize_row
-from .types import TokenizationResult
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - Arrow is optional, the row path is used without it
+    pa = None
+    pc = None
+
+from .batching import AdaptiveBatchSizer, BatchSizingConfig
+from .run_context import RunContext
+from .statement_cache import StatementCache
+from .throttle import Throttle, ThrottleConfig
+from .token_logic import TOKEN_PATTERN, TOKEN_PREFIX, TOKEN_SUFFIX, ColumnSetBuffer, tokenize_value
+from .types import PageProgress, TokenizationEstimate, TokenizationResult
 
 LOGGER = logging.getLogger(__name__)
 
+# Changed column names -> parameter rows of the form (pk, value, ...).
+ColumnSetGroups = Dict[Tuple[str, ...], List[Sequence[object]]]
+
 
 def _quote_identifier(identifier: str) -> str:
     return f"`{identifier.replace('`', '``')}`"
@@ -35,10 +52,25 @@ class DatabricksConfig:
 class DatabricksTokenizer:
     """Tokenize columns in Databricks tables when credentials are available."""
 
-    def __init__(self, config: DatabricksConfig, *, pk_column: str = "id", limit: int = 1000) -> None:
+    def __init__(
+        self,
+        config: DatabricksConfig,
+        *,
+        pk_column: str = "id",
+        limit: int = 1000,
+        batch_sizing: Optional[BatchSizingConfig] = None,
+        throttle: Optional[Throttle] = None,
+        use_arrow: bool = True,
+        merge_max_rows: int = 2000,
+    ) -> None:
         self.config = config
         self.pk_column = pk_column
         self.limit = limit
+        self.batch_sizing = batch_sizing
+        self.throttle = throttle or Throttle()
+        self.use_arrow = bool(use_arrow and pa is not None)
+        self.merge_max_rows = merge_max_rows
+        self.statements = StatementCache(max_entries=256)
         self.enabled = bool(dbsql and config and (config.server_hostname and config.http_path and config.access_token))
         if not self.enabled:
             LOGGER.info("Databricks tokenizer disabled: missing configuration or connector")
@@ -66,7 +98,15 @@ class DatabricksTokenizer:
             access_token=access_token,
             catalog=catalog,
         )
-        return cls(config, pk_column=pk_column, limit=limit)
+        return cls(
+            config,
+            pk_column=pk_column,
+            limit=limit,
+            batch_sizing=BatchSizingConfig.from_env("DBX"),
+            throttle=Throttle(ThrottleConfig.from_env("DBX")),
+            use_arrow=os.getenv("DBX_ARROW", "true").lower() in {"1", "true", "yes"},
+            merge_max_rows=int(os.getenv("DBX_MERGE_MAX_ROWS", "2000")),
+        )
 
     @staticmethod
     def _parse_jdbc_url(jdbc_url: str) -> Dict[str, str]:
@@ -98,6 +138,7 @@ class DatabricksTokenizer:
         schema: str,
         table: str,
         columns: Sequence[str],
+        context: Optional[RunContext] = None,
     ) -> TokenizationResult:
         dataset_name = ".".join(part for part in [catalog, schema, table] if part)
         if not columns:
@@ -121,6 +162,21 @@ class DatabricksTokenizer:
 
         quoted_table = self._qualified_table(catalog or self.config.catalog, schema, table)
         LOGGER.info("Starting Databricks tokenization for %s", quoted_table)
+        rows_scanned = 0
+        rows_updated = 0
+        resume_after = context.resume_after if context else None
+        last_pk = context.position if context else None
+        page = 0
+        started = time.monotonic()
+        sizer = AdaptiveBatchSizer(self.limit, self.batch_sizing)
+        throttled_seconds = 0.0
+        cells_updated = 0
+        statement_hits = 0
+        cancelled = False
+        preempted = False
+        # Row path: tuples in _build_select_sql order, the key first and then the columns.
+        tokenized_columns = [col for col in columns if col != self.pk_column]
+        buffer = ColumnSetBuffer(tokenized_columns, range(1, len(tokenized_columns) + 1), 0, pk_first=True)
 
         with dbsql.connect(
             server_hostname=self.config.server_hostname,
@@ -129,24 +185,54 @@ class DatabricksTokenizer:
             timeout=self.config.timeout,
         ) as connection:
             with connection.cursor() as cursor:
-                select_sql, params = self._build_select_sql(quoted_table, columns)
-                cursor.execute(select_sql, params)
-                rows = cursor.fetchall()
-                column_names = [desc[0] for desc in cursor.description]
-                rows_scanned = len(rows)
-                rows_updated = 0
-
-                for row in rows:
-                    row_dict = dict(zip(column_names, row))
-                    pk_value = row_dict[self.pk_column]
-                    updates = tokenize_row(row_dict, columns)
-                    if not updates or all(row_dict[col] == updates[col] for col in updates):
-                        continue
-                    update_sql = self._build_update_sql(quoted_table, updates.keys())
-                    cursor.execute(update_sql, list(updates.values()) + [pk_value])
-                    rows_updated += 1
+                while True:
+                    limit = sizer.size
+                    page_started = time.monotonic()
+                    select_sql, params = self._build_select_sql(quoted_table, columns, limit=limit, after=last_pk)
+                    cursor.execute(select_sql, params)
+                    if self.use_arrow:
+                        fetched, groups, page_last_pk = self._tokenize_page_arrow(cursor, columns)
+                    else:
+                        fetched, groups, page_last_pk = self._tokenize_page_rows(cursor, buffer)
+                    statements, hits = self._merge_column_sets(cursor, quoted_table, groups)
+                    statement_hits += hits
+                    page_updates = sum(len(group) for group in groups.values())
+                    rows_scanned += fetched
+                    rows_updated += page_updates
+                    cells_updated += sum(len(group) * len(column_set) for column_set, group in groups.items())
 
-            connection.commit()
+                    connection.commit()
+                    page += 1
+                    sizer.observe(fetched, time.monotonic() - page_started)
+                    throttled_seconds += self.throttle.page_done(page_updates, statements + 1)
+                    if fetched:
+                        last_pk = page_last_pk
+                    if context is not None:
+                        context.page_committed(
+                            PageProgress(
+                                dataset=dataset_name,
+                                page=page,
+                                batch_rows=fetched,
+                                rows_scanned=rows_scanned,
+                                rows_updated=rows_updated,
+                                last_pk=None if last_pk is None else str(last_pk),
+                                elapsed_seconds=time.monotonic() - started,
+                                batch_size=limit,
+                            )
+                        )
+                    if fetched < limit:
+                        break
+                    if context is not None and context.should_stop:
+                        cancelled = context.cancelled
+                        preempted = not cancelled
+                        LOGGER.info(
+                            "Run %s %s after page %d of %s",
+                            context.run_id,
+                            "cancelled" if cancelled else "preempted",
+                            page,
+                            dataset_name,
+                        )
+                        break
 
         return TokenizationResult(
             dataset=dataset_name,
@@ -154,32 +240,255 @@ class DatabricksTokenizer:
             columns=list(columns),
             rows_scanned=rows_scanned,
             rows_updated=rows_updated,
+            last_pk=None if last_pk is None else str(last_pk),
+            complete=resume_after is None and not cancelled and not preempted,
+            batch_sizes=sizer.summary,
+            throttled_seconds=throttled_seconds,
+            cells_updated=cells_updated,
+            statement_cache_hits=statement_hits,
+            preemptions=int(preempted),
+            details=f"Cancelled after page {page}" if cancelled else None,
         )
 
-    def _build_select_sql(self, table: str, columns: Sequence[str]) -> tuple[str, List[object]]:
-        select_cols = [_quote_identifier(self.pk_column)] + [
-            _quote_identifier(col) for col in columns if col != self.pk_column
-        ]
+    def _tokenize_page_rows(self, cursor, buffer: ColumnSetBuffer) -> Tuple[int, ColumnSetGroups, object]:
+        """Tokenize one fetched page row by row; returns (fetched, column-set groups, last_pk)."""
+
+        rows = cursor.fetchall()
+        buffer.clear()
+        if not rows:
+            return 0, {}, None
+        for row in rows:
+            buffer.add(row)
+        return len(rows), dict(buffer.column_sets()), rows[-1][0]
+
+    def _tokenize_page_arrow(self, cursor, columns: Sequence[str]) -> Tuple[int, ColumnSetGroups, object]:
+        """Tokenize one fetched page column by column; returns (fetched, column-set groups, last_pk).
+
+        Masking and grouping stay columnar, but the connector binds Python
+        parameters, so each written row ends up as one tuple of Python values.
+        """
+
+        batch = cursor.fetchall_arrow()
+        fetched = batch.num_rows
+        if not fetched:
+            return 0, {}, None
+        pk_values = batch.column(self.pk_column)
+        last_pk = pk_values[fetched - 1].as_py()
+
+        present = [col for col in columns if col in batch.column_names and col != self.pk_column]
+        tokenized = {col: _tokenize_arrow_column(batch.column(col)) for col in present}
+        # Encode which columns change in each row as a bit mask, then split the page by mask.
+        codes = pa.array([0] * fetched, type=pa.int64())
+        for bit, col in enumerate(present):
+            codes = pc.add(codes, pc.multiply(pc.cast(tokenized[col][1], pa.int64()), 1 << bit))
+
+        groups: ColumnSetGroups = {}
+        for code in pc.unique(codes).to_pylist():
+            if not code:
+                continue
+            selected = pc.equal(codes, code)
+            column_set = tuple(col for bit, col in enumerate(present) if code & (1 << bit))
+            values = [tokenized[col][0].filter(selected).to_pylist() for col in column_set]
+            groups[column_set] = list(zip(pk_values.filter(selected).to_pylist(), *values))
+        return fetched, groups, last_pk
+
+    def _merge_column_sets(self, cursor, table: str, groups: ColumnSetGroups) -> Tuple[int, int]:
+        """Write each column-set group with chunked ``MERGE`` statements.
+
+        Chunks are padded to a power-of-two row count (capped at
+        ``merge_max_rows``) with NULL-key rows that match nothing, so a few
+        statement shapes cover every page size and the warehouse sees
+        identical parameterized statements. Returns (statements, cache hits).
+        """
+
+        statements = 0
+        hits = 0
+        for column_set, group in groups.items():
+            filler = [None] * (len(column_set) + 1)
+            for start in range(0, len(group), self.merge_max_rows):
+                chunk = group[start : start + self.merge_max_rows]
+                bucket = _merge_bucket(len(chunk), self.merge_max_rows)
+                params: List[object] = [value for row in chunk for value in row]
+                params.extend(filler * (bucket - len(chunk)))
+                merge_sql, hit = self.statements.get(
+                    None,
+                    (table, column_set, bucket),
+                    lambda: self._build_merge_sql(table, column_set, bucket),
+                )
+                cursor.execute(merge_sql, params)
+                statements += 1
+                hits += hit
+        return statements, hits
+
+    def change_marker(self, *, catalog: Optional[str], schema: str, table: str) -> Optional[str]:
+        """Return the current Delta table version, or ``None`` when unavailable."""
+
+        if not self.enabled:
+            return None
+        quoted_table = self._qualified_table(catalog or self.config.catalog, schema, table)
+        with dbsql.connect(
+            server_hostname=self.config.server_hostname,
+            http_path=self.config.http_path,
+            access_token=self.config.access_token,
+            timeout=self.config.timeout,
+        ) as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DESCRIBE HISTORY {quoted_table} LIMIT 1")
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                column_names = [desc[0] for desc in cursor.description]
+        return str(row[column_names.index("version")])
+
+    def has_pending(self, *, catalog: Optional[str], schema: str, table: str, columns: Sequence[str]) -> bool:
+        """Return whether any row of the latest table version still matches the scan predicate."""
+
+        if not columns:
+            return False
+        if not self.enabled:
+            return True
+        quoted_table = self._qualified_table(catalog or self.config.catalog, schema, table)
+        with dbsql.connect(
+            server_hostname=self.config.server_hostname,
+            http_path=self.config.http_path,
+            access_token=self.config.access_token,
+            timeout=self.config.timeout,
+        ) as connection:
+            with connection.cursor() as cursor:
+                where_clause, params = self._build_predicate(columns)
+                cursor.execute(f"SELECT 1 FROM {quoted_table} WHERE {where_clause} LIMIT 1", params)
+                return cursor.fetchone() is not None
+
+    def estimate(
+        self,
+        *,
+        catalog: Optional[str],
+        schema: str,
+        table: str,
+        columns: Sequence[str],
+    ) -> TokenizationEstimate:
+        """Count the rows a run would touch using the same predicate as the scan."""
+
+        dataset_name = ".".join(part for part in [catalog, schema, table] if part)
+        if not columns or not self.enabled:
+            return TokenizationEstimate(
+                dataset=dataset_name,
+                platform="databricks",
+                columns=list(columns),
+                estimated_rows=0,
+                pages=0,
+                batch_size=self.limit,
+                exact=not columns,
+                details="No columns requested" if not columns else "Databricks connection not configured",
+            )
+
+        quoted_table = self._qualified_table(catalog or self.config.catalog, schema, table)
+        with dbsql.connect(
+            server_hostname=self.config.server_hostname,
+            http_path=self.config.http_path,
+            access_token=self.config.access_token,
+            timeout=self.config.timeout,
+        ) as connection:
+            with connection.cursor() as cursor:
+                where_clause, params = self._build_predicate(columns)
+                cursor.execute(f"SELECT COUNT(*) FROM {quoted_table} WHERE {where_clause}", params)
+                estimated_rows = int(cursor.fetchone()[0])
+
+        return TokenizationEstimate(
+            dataset=dataset_name,
+            platform="databricks",
+            columns=list(columns),
+            estimated_rows=estimated_rows,
+            pages=math.ceil(estimated_rows / self.limit) if self.limit else 0,
+            batch_size=self.limit,
+            exact=True,
+        )
+
+    def _build_predicate(self, columns: Sequence[str]) -> tuple[str, List[object]]:
         where_conditions = [
             f"({_quote_identifier(col)} IS NOT NULL AND {_quote_identifier(col)} NOT LIKE ?)"
             for col in columns
         ]
+        params: List[object] = ["tok_%_poc" for _ in columns]
+        return " OR ".join(where_conditions), params
+
+    def _build_select_sql(
+        self,
+        table: str,
+        columns: Sequence[str],
+        *,
+        limit: Optional[int] = None,
+        after: Optional[object] = None,
+    ) -> tuple[str, List[object]]:
+        select_cols = [_quote_identifier(self.pk_column)] + [
+            _quote_identifier(col) for col in columns if col != self.pk_column
+        ]
+        where_clause, params = self._build_predicate(columns)
+        if after is not None:
+            where_clause = f"{_quote_identifier(self.pk_column)} > ? AND ({where_clause})"
+            params.insert(0, after)
         sql_query = (
             f"SELECT {', '.join(select_cols)} FROM {table} "
-            f"WHERE {' OR '.join(where_conditions)} ORDER BY {_quote_identifier(self.pk_column)} LIMIT {self.limit}"
+            f"WHERE {where_clause} ORDER BY {_quote_identifier(self.pk_column)} LIMIT {int(limit or self.limit)}"
         )
-        params: List[object] = ["tok_%_poc" for _ in columns]
         return sql_query, params
 
-    def _build_update_sql(self, table: str, columns: Iterable[str]) -> str:
-        assignments = [f"{_quote_identifier(col)} = ?" for col in columns]
-        sql_query = (
-            f"UPDATE {table} SET {', '.join(assignments)} "
-            f"WHERE {_quote_identifier(self.pk_column)} = ?"
+    def _build_merge_sql(self, table: str, columns: Sequence[str], row_count: int) -> str:
+        aliases = [f"c{index}" for index in range(len(columns))]
+        row_marker = f"({', '.join(['?'] * (len(columns) + 1))})"
+        assignments = [
+            f"target.{_quote_identifier(col)} = source.{alias}" for col, alias in zip(columns, aliases)
+        ]
+        return (
+            f"MERGE INTO {table} AS target "
+            f"USING (VALUES {', '.join([row_marker] * row_count)}) AS source(pk, {', '.join(aliases)}) "
+            f"ON target.{_quote_identifier(self.pk_column)} = source.pk "
+            f"WHEN MATCHED THEN UPDATE SET {', '.join(assignments)}"
         )
-        return sql_query
 
     @staticmethod
     def _qualified_table(catalog: Optional[str], schema: str, table: str) -> str:
         parts = [part for part in [catalog, schema, table] if part]
         return ".".join(_quote_identifier(part) for part in parts)
+
+
+def _merge_bucket(rows: int, maximum: int) -> int:
+    """Round ``rows`` up to the next power of two, capped at ``maximum``."""
+
+    bucket = 1
+    while bucket < rows:
+        bucket *= 2
+    return min(bucket, maximum)
+
+
+def _tokenize_arrow_column(column) -> Tuple[object, object]:
+    """Return ``(tokenized, changed)`` arrays for an Arrow column.
+
+    For string columns, nulls and values that already match the token format
+    are left untouched; only the remaining values are base64-encoded, and the
+    token prefix and suffix are attached with a single vectorized join. Other
+    types go through :func:`tokenize_value`, because Arrow's string cast
+    formats floats, booleans and timestamps differently from ``str()`` and
+    would produce tokens that differ from the row path and from Postgres.
+    """
+
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if not (pa.types.is_string(column.type) or pa.types.is_large_string(column.type)):
+        original = column.to_pylist()
+        tokens = [tokenize_value(value) for value in original]
+        changed = pa.array([token != value for token, value in zip(tokens, original)], type=pa.bool_())
+        return pa.array(tokens, type=pa.string()), changed
+
+    values = column.cast(pa.string())
+    already_tokenized = pc.match_substring_regex(values, TOKEN_PATTERN.pattern)
+    changed = pc.fill_null(pc.invert(already_tokenized), False)
+    pending = values.filter(changed)
+    if not len(pending):
+        return values, changed
+    encoded = pa.array(
+        [base64.b64encode(value.encode("utf-8")).decode("ascii") for value in pending.to_pylist()],
+        type=pa.string(),
+    )
+    tokens = pc.binary_join_element_wise(TOKEN_PREFIX, encoded, TOKEN_SUFFIX, "")
+    return pc.replace_with_mask(values, changed, tokens), changed
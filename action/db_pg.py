@@ -1,36 +1,102 @@
 """PostgreSQL tokenization routines."""
 from __future__ import annotations
 
+import hashlib
 import logging
+import math
 import os
-from typing import Iterable, List, Sequence
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import psycopg2
-from psycopg2 import sql
-from psycopg2.extras import RealDictCursor
+from psycopg2 import extensions, sql
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import execute_batch
 
-from .types import TokenizationResult
-from .token_logic import tokenize_row
+from .batching import AdaptiveBatchSizer, BatchSizingConfig
+from .run_context import LeaseUnavailable, RunContext
+from .statement_cache import StatementCache
+from .throttle import HealthSample, Throttle, ThrottleConfig
+from .types import PageProgress, TokenizationEstimate, TokenizationResult
+from .token_logic import ColumnSetBuffer
 
 LOGGER = logging.getLogger(__name__)
 
+# Rows sent per round trip when executing a column-set UPDATE.
+UPDATE_PAGE_SIZE = 100
+
+# Before PostgreSQL 15 backends report table counters at most this often, and
+# readers accept statistics snapshots that are up to this old.
+PGSTAT_INTERVAL_SECONDS = 0.5
+
+# How pages claim their rows: wait on locked rows, or skip them and come back later.
+CLAIM_LOCK = "lock"
+CLAIM_SKIP_LOCKED = "skip_locked"
+CLAIM_MODES = (CLAIM_LOCK, CLAIM_SKIP_LOCKED)
+
 
 class PostgresTokenizer:
     """Tokenize PII columns inside a PostgreSQL table."""
 
-    def __init__(self, conn_str: str, *, pk_column: str = "id", limit: int = 1000) -> None:
+    def __init__(
+        self,
+        conn_str: str,
+        *,
+        pk_column: str = "id",
+        limit: int = 1000,
+        exact_count_threshold: int = 1_000_000,
+        batch_sizing: Optional[BatchSizingConfig] = None,
+        throttle: Optional[Throttle] = None,
+        lease_wait_seconds: float = 30.0,
+        pool_size: int = 4,
+        claim_mode: str = CLAIM_LOCK,
+        revisit_passes: int = 3,
+        revisit_delay_seconds: float = 1.0,
+    ) -> None:
+        if claim_mode not in CLAIM_MODES:
+            raise ValueError(f"Unknown claim mode {claim_mode!r}; expected one of {', '.join(CLAIM_MODES)}")
         self.conn_str = conn_str
         self.pk_column = pk_column
         self.limit = limit
+        self.exact_count_threshold = exact_count_threshold
+        self.batch_sizing = batch_sizing
+        self.throttle = throttle or Throttle()
+        self.lease_wait_seconds = lease_wait_seconds
+        self.pool_size = pool_size
+        self.claim_mode = claim_mode
+        self.revisit_passes = revisit_passes
+        self.revisit_delay_seconds = revisit_delay_seconds
+        self.statements = StatementCache()
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._pool_slots = threading.BoundedSemaphore(pool_size)
 
     @classmethod
-    def from_env(cls) -> "PostgresTokenizer":
-        conn_str = os.getenv("PG_CONN_STR")
+    def from_env(cls, *, conn_str: Optional[str] = None, pool_size: Optional[int] = None) -> "PostgresTokenizer":
+        """Build a tokenizer from ``PG_*`` settings; ``conn_str`` and ``pool_size`` override them per route."""
+
+        conn_str = conn_str or os.getenv("PG_CONN_STR")
         if not conn_str:
             raise RuntimeError("PG_CONN_STR environment variable is required for Postgres tokenization")
         pk_column = os.getenv("PG_PK_COLUMN", "id")
         limit = int(os.getenv("PG_TOKENIZE_LIMIT", "1000"))
-        return cls(conn_str, pk_column=pk_column, limit=limit)
+        exact_count_threshold = int(os.getenv("PG_DRY_RUN_COUNT_THRESHOLD", "1000000"))
+        return cls(
+            conn_str,
+            pk_column=pk_column,
+            limit=limit,
+            exact_count_threshold=exact_count_threshold,
+            batch_sizing=BatchSizingConfig.from_env("PG"),
+            throttle=Throttle(ThrottleConfig.from_env("PG")),
+            lease_wait_seconds=float(os.getenv("PG_LEASE_WAIT_S", "30")),
+            # One connection beyond the run slots keeps change-marker and estimate queries from queueing.
+            pool_size=pool_size or int(os.getenv("PG_POOL_SIZE") or int(os.getenv("PG_MAX_CONCURRENCY", "4")) + 1),
+            claim_mode=os.getenv("PG_CLAIM_MODE", CLAIM_LOCK),
+            revisit_passes=int(os.getenv("PG_CLAIM_REVISIT_PASSES", "3")),
+            revisit_delay_seconds=float(os.getenv("PG_CLAIM_REVISIT_DELAY_S", "1")),
+        )
 
     def tokenize(
         self,
@@ -39,7 +105,18 @@ class PostgresTokenizer:
         schema: str,
         table: str,
         columns: Sequence[str],
+        context: Optional[RunContext] = None,
     ) -> TokenizationResult:
+        """Tokenize ``columns`` page by page, committing after every page.
+
+        With ``claim_mode="skip_locked"`` pages claim rows with ``FOR UPDATE
+        SKIP LOCKED`` and no table lease is taken, so application writers are
+        never blocked and several workers can share a table. Rows skipped
+        because they were locked are picked up by up to ``revisit_passes``
+        further passes over the table; if some are still locked after that the
+        result is reported as incomplete.
+        """
+
         if not columns:
             LOGGER.info("No columns to tokenize for %s.%s.%s", database, schema, table)
             return TokenizationResult(
@@ -57,73 +134,413 @@ class PostgresTokenizer:
             table,
             ",".join(columns),
         )
+        dataset_name = f"{database}.{schema}.{table}"
         rows_scanned = 0
         rows_updated = 0
+        resume_after = context.resume_after if context else None
+        last_pk = context.position if context else None
+        page = 0
+        started = time.monotonic()
+        sizer = AdaptiveBatchSizer(self.limit, self.batch_sizing)
+        throttled_seconds = 0.0
+        cells_updated = 0
+        statement_hits = 0
+        cancelled = False
+        preempted = False
+        skip_locked = self.claim_mode == CLAIM_SKIP_LOCKED
+        scan_after = last_pk
+        revisits = 0
+        still_locked = False
+
+        lease = nullcontext() if skip_locked else self.lease(schema, table)
+        with lease, self._connection() as conn:
+            session = conn.get_backend_pid()
+            # Rows come back as plain tuples in _build_select_query order: the key, then the columns.
+            tokenized_columns = [col for col in columns if col != self.pk_column]
+            buffer = ColumnSetBuffer(tokenized_columns, range(1, len(tokenized_columns) + 1), 0)
+            with conn.cursor() as cur:
+                while True:
+                    throttled_seconds += self.throttle.wait_healthy(lambda: self._health_sample(conn))
+                    limit = sizer.size
+                    page_started = time.monotonic()
+                    select_query, params = self._build_select_query(
+                        schema, table, columns, limit=limit, after=scan_after, skip_locked=skip_locked
+                    )
+                    LOGGER.debug("Executing select query: %s", select_query.as_string(cur))
+                    cur.execute(select_query, params)
+                    rows = cur.fetchall()
+                    rows_scanned += len(rows)
+                    buffer.clear()
+                    for row in rows:
+                        buffer.add(row)
+                    page_updates = 0
+                    page_statements = 1
+
+                    # One UPDATE per set of changed columns, so untouched columns are never rewritten.
+                    for column_set, group in buffer.column_sets():
+                        update_query, hit = self._prepared_update(cur, session, schema, table, column_set)
+                        statement_hits += hit
+                        LOGGER.debug("Updating %d rows of %s: %s", len(group), dataset_name, ", ".join(column_set))
+                        execute_batch(cur, update_query, group, page_size=UPDATE_PAGE_SIZE)
+                        page_updates += len(group)
+                        page_statements += math.ceil(len(group) / UPDATE_PAGE_SIZE)
+                        cells_updated += len(group) * len(column_set)
 
-        with psycopg2.connect(self.conn_str) as conn:
-            conn.autocommit = False
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                select_query, params = self._build_select_query(schema, table, columns)
-                LOGGER.debug("Executing select query: %s", select_query.as_string(cur))
-                cur.execute(select_query, params)
-                rows = cur.fetchall()
-                rows_scanned = len(rows)
-
-                for row in rows:
-                    pk_value = row[self.pk_column]
-                    updates = tokenize_row(row, columns)
-                    if not updates or all(row[col] == updates[col] for col in updates):
-                        continue
-                    update_query = self._build_update_query(schema, table, updates.keys())
-                    update_params = list(updates.values()) + [pk_value]
-                    LOGGER.debug("Updating row %s: %s", pk_value, updates)
-                    cur.execute(update_query, update_params)
-                    rows_updated += 1
-
-            conn.commit()
+                    rows_updated += page_updates
+
+                    conn.commit()
+                    page += 1
+                    page_seconds = time.monotonic() - page_started
+                    # Row locks taken by FOR UPDATE are held for the whole page.
+                    sizer.observe(len(rows), page_seconds, lock_seconds=page_seconds)
+                    throttled_seconds += self.throttle.page_done(page_updates, page_statements)
+                    if rows:
+                        scan_after = rows[-1][0]
+                        if not revisits:
+                            last_pk = scan_after
+                    if context is not None:
+                        context.page_committed(
+                            PageProgress(
+                                dataset=dataset_name,
+                                page=page,
+                                batch_rows=len(rows),
+                                rows_scanned=rows_scanned,
+                                rows_updated=rows_updated,
+                                last_pk=None if last_pk is None else str(last_pk),
+                                elapsed_seconds=time.monotonic() - started,
+                                batch_size=limit,
+                            )
+                        )
+                    if len(rows) < limit:
+                        if not skip_locked or not self._has_pending_rows(cur, schema, table, columns, after=resume_after):
+                            break
+                        conn.commit()
+                        if revisits >= self.revisit_passes:
+                            LOGGER.warning("Rows of %s still locked after %d revisit passes", dataset_name, revisits)
+                            still_locked = True
+                            break
+                        # Locked rows were skipped; rescan once their writers had a chance to commit.
+                        revisits += 1
+                        LOGGER.info("Revisiting skipped rows of %s (pass %d)", dataset_name, revisits)
+                        time.sleep(self.revisit_delay_seconds)
+                        scan_after = resume_after
+                    if context is not None and context.should_stop:
+                        cancelled = context.cancelled
+                        preempted = not cancelled
+                        LOGGER.info(
+                            "Run %s %s after page %d of %s",
+                            context.run_id,
+                            "cancelled" if cancelled else "preempted",
+                            page,
+                            dataset_name,
+                        )
+                        break
+                if rows_updated:
+                    _flush_stats(conn, cur)
 
         return TokenizationResult(
-            dataset=f"{database}.{schema}.{table}",
+            dataset=dataset_name,
             platform="postgres",
             columns=list(columns),
             rows_scanned=rows_scanned,
             rows_updated=rows_updated,
+            last_pk=None if last_pk is None else str(last_pk),
+            complete=resume_after is None and not cancelled and not preempted and not still_locked,
+            batch_sizes=sizer.summary,
+            throttled_seconds=throttled_seconds,
+            cells_updated=cells_updated,
+            statement_cache_hits=statement_hits,
+            preemptions=int(preempted),
+            details=_tokenize_details(page, cancelled=cancelled, still_locked=still_locked),
         )
 
-    def _build_select_query(
+    @contextmanager
+    def lease(self, schema: str, table: str) -> Iterator[None]:
+        """Hold a session-level advisory lock on ``schema.table`` for one run.
+
+        Replicas sharing a Kafka consumer group use the lock so only one of
+        them tokenizes a table at a time. The lock lives on its own connection
+        and is released when that connection closes, even if the process dies.
+        Raises :class:`LeaseUnavailable` after ``lease_wait_seconds``.
+        """
+
+        key = f"tokenize:{schema}.{table}"
+        conn = psycopg2.connect(self.conn_str)
+        conn.autocommit = True
+        try:
+            deadline = time.monotonic() + self.lease_wait_seconds
+            with conn.cursor() as cur:
+                while True:
+                    cur.execute("SELECT pg_try_advisory_lock(hashtext(%s))", [key])
+                    if cur.fetchone()[0]:
+                        break
+                    if time.monotonic() >= deadline:
+                        raise LeaseUnavailable(f"{schema}.{table} is being tokenized by another worker")
+                    time.sleep(0.5)
+            yield
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _connection(self) -> Iterator[extensions.connection]:
+        """Borrow a pooled connection, blocking while all ``pool_size`` are in use.
+
+        The connection is handed back without an open transaction. Connections
+        that were closed underneath us are discarded together with the
+        statements prepared on them.
+        """
+
+        with self._pool_slots:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            session = conn.get_backend_pid()
+            try:
+                yield conn
+            finally:
+                if not conn.closed and conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        conn.close()
+                if conn.closed:
+                    self.statements.forget(session)
+                pool.putconn(conn, close=bool(conn.closed))
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # psycopg2 closes returned connections beyond ``minconn``, so keep them all.
+                    self._pool = ThreadedConnectionPool(self.pool_size, self.pool_size, self.conn_str)
+        return self._pool
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+                # Backend pids may be reused by the next pool's connections.
+                self.statements.clear()
+
+    def _prepared_update(
+        self, cur, session: int, schema: str, table: str, column_set: Sequence[str]
+    ) -> Tuple[sql.Composed, bool]:
+        """Return an ``EXECUTE`` statement for the UPDATE of ``column_set``, preparing it once per session."""
+
+        def prepare() -> sql.Identifier:
+            key = f"{schema}.{table}:{self.pk_column}:{','.join(column_set)}"
+            name = sql.Identifier(f"tokenize_update_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}")
+            cur.execute(
+                sql.SQL("PREPARE {name} AS {update}").format(
+                    name=name,
+                    update=self._build_update_query(schema, table, column_set, positional=True),
+                )
+            )
+            return name
+
+        name, hit = self.statements.get(session, (schema, table, tuple(column_set)), prepare)
+        execute = sql.SQL("EXECUTE {name} ({params})").format(
+            name=name,
+            params=sql.SQL(", ").join(sql.Placeholder() for _ in range(len(column_set) + 1)),
+        )
+        return execute, hit
+
+    def _health_sample(self, conn) -> HealthSample:
+        """Read replication lag and lock contention for :class:`Throttle`."""
+
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT "
+                "(SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication), "
+                "(SELECT COUNT(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock' AND pid <> pg_backend_pid())"
+            )
+            lag, lock_waits = cur.fetchone()
+        conn.commit()
+        return HealthSample(replication_lag_seconds=float(lag or 0.0), lock_waits=int(lock_waits or 0))
+
+    def change_marker(self, *, database: str, schema: str, table: str) -> Optional[str]:
+        """Return a value that changes whenever rows are inserted, updated or deleted.
+
+        Based on the cumulative tuple counters in ``pg_stat_user_tables``; returns
+        ``None`` when the table has no statistics entry.
+        """
+
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT n_tup_ins, n_tup_upd, n_tup_del, n_live_tup FROM pg_stat_user_tables "
+                    "WHERE schemaname = %s AND relname = %s",
+                    [schema or "public", table],
+                )
+                row = cur.fetchone()
+        if row is None:
+            return None
+        return ":".join(str(value) for value in row)
+
+    def has_pending(self, *, database: str, schema: str, table: str, columns: Sequence[str]) -> bool:
+        """Return whether any row still matches the tokenization predicate.
+
+        Runs in a new read-only transaction, so it sees every write committed
+        before the call.
+        """
+
+        if not columns:
+            return False
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SET TRANSACTION READ ONLY")
+                pending = self._has_pending_rows(cur, schema, table, columns)
+            conn.rollback()
+        return pending
+
+    def estimate(
         self,
+        *,
+        database: str,
         schema: str,
         table: str,
         columns: Sequence[str],
-    ) -> tuple[sql.SQL, List[object]]:
-        select_columns = [self.pk_column] + [col for col in columns if col != self.pk_column]
-        select_list = sql.SQL(", ").join(sql.Identifier(col) for col in select_columns)
+        exact_count: bool = True,
+    ) -> TokenizationEstimate:
+        """Estimate the work a run would do without locking or modifying rows.
+
+        The planner estimate from ``EXPLAIN`` is always collected; an exact
+        ``COUNT`` is only issued when ``exact_count`` is set and the planner
+        expects fewer rows than ``exact_count_threshold`` so that dry runs stay
+        cheap on large tables.
+        """
+
+        dataset_name = f"{database}.{schema}.{table}"
+        if not columns:
+            return TokenizationEstimate(
+                dataset=dataset_name,
+                platform="postgres",
+                columns=list(columns),
+                estimated_rows=0,
+                pages=0,
+                batch_size=self.limit,
+                exact=True,
+                details="No columns requested",
+            )
+
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SET TRANSACTION READ ONLY")
+                where_clause, params = self._build_predicate(columns)
+                table_sql = self._qualified_table(schema, table)
+                explain_query = sql.SQL("EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} WHERE {where_clause}").format(
+                    table=table_sql,
+                    where_clause=where_clause,
+                )
+                cur.execute(explain_query, params)
+                plan = cur.fetchone()[0]
+                estimated_rows = int(plan[0]["Plan"]["Plan Rows"])
+                exact = False
+                if exact_count and estimated_rows < self.exact_count_threshold:
+                    count_query = sql.SQL("SELECT COUNT(*) FROM {table} WHERE {where_clause}").format(
+                        table=table_sql,
+                        where_clause=where_clause,
+                    )
+                    cur.execute(count_query, params)
+                    estimated_rows = int(cur.fetchone()[0])
+                    exact = True
+            conn.rollback()
+
+        return TokenizationEstimate(
+            dataset=dataset_name,
+            platform="postgres",
+            columns=list(columns),
+            estimated_rows=estimated_rows,
+            pages=math.ceil(estimated_rows / self.limit) if self.limit else 0,
+            batch_size=self.limit,
+            exact=exact,
+        )
+
+    def _build_predicate(self, columns: Sequence[str]) -> tuple[sql.Composed, List[object]]:
         conditions = [
             sql.SQL("({col} IS NOT NULL AND {col} NOT LIKE %s)").format(col=sql.Identifier(col))
             for col in columns
         ]
-        where_clause = sql.SQL(" OR ").join(conditions)
+        params: List[object] = ["tok_%_poc" for _ in columns]
+        return sql.SQL(" OR ").join(conditions), params
+
+    def _build_select_query(
+        self,
+        schema: str,
+        table: str,
+        columns: Sequence[str],
+        *,
+        limit: Optional[int] = None,
+        after: Optional[object] = None,
+        skip_locked: bool = False,
+    ) -> tuple[sql.SQL, List[object]]:
+        select_columns = [self.pk_column] + [col for col in columns if col != self.pk_column]
+        select_list = sql.SQL(", ").join(sql.Identifier(col) for col in select_columns)
+        where_clause, params = self._build_predicate(columns)
+        if after is not None:
+            where_clause = sql.SQL("{pk} > %s AND ({predicate})").format(
+                pk=sql.Identifier(self.pk_column),
+                predicate=where_clause,
+            )
+            params.insert(0, after)
         query = sql.SQL(
-            "SELECT {columns} FROM {table} WHERE {where_clause} ORDER BY {pk} LIMIT %s FOR UPDATE"
+            "SELECT {columns} FROM {table} WHERE {where_clause} ORDER BY {pk} LIMIT %s FOR UPDATE{skip}"
         ).format(
             columns=select_list,
             table=self._qualified_table(schema, table),
             where_clause=where_clause,
             pk=sql.Identifier(self.pk_column),
+            skip=sql.SQL(" SKIP LOCKED" if skip_locked else ""),
         )
-        params: List[object] = ["tok_%_poc" for _ in columns]
-        params.append(self.limit)
+        params.append(limit or self.limit)
         return query, params
 
-    def _build_update_query(self, schema: str, table: str, columns: Iterable[str]):
+    def _has_pending_rows(
+        self,
+        cur,
+        schema: str,
+        table: str,
+        columns: Sequence[str],
+        *,
+        after: Optional[object] = None,
+    ) -> bool:
+        """Return whether untokenized rows remain, without locking or waiting on any."""
+
+        where_clause, params = self._build_predicate(columns)
+        if after is not None:
+            where_clause = sql.SQL("{pk} > %s AND ({predicate})").format(
+                pk=sql.Identifier(self.pk_column),
+                predicate=where_clause,
+            )
+            params.insert(0, after)
+        cur.execute(
+            sql.SQL("SELECT EXISTS (SELECT 1 FROM {table} WHERE {where_clause})").format(
+                table=self._qualified_table(schema, table),
+                where_clause=where_clause,
+            ),
+            params,
+        )
+        return bool(cur.fetchone()[0])
+
+    def _build_update_query(self, schema: str, table: str, columns: Iterable[str], *, positional: bool = False):
+        """Build ``UPDATE ... SET col = %s ... WHERE pk = %s``; ``positional`` uses ``$n`` for ``PREPARE``."""
+
+        columns = list(columns)
+        if positional:
+            markers = [sql.SQL(f"${index}") for index in range(1, len(columns) + 2)]
+        else:
+            markers = [sql.Placeholder()] * (len(columns) + 1)
         assignments = [
-            sql.SQL("{col} = %s").format(col=sql.Identifier(col))
-            for col in columns
+            sql.SQL("{col} = {marker}").format(col=sql.Identifier(col), marker=marker)
+            for col, marker in zip(columns, markers)
         ]
-        query = sql.SQL("UPDATE {table} SET {assignments} WHERE {pk} = %s").format(
+        query = sql.SQL("UPDATE {table} SET {assignments} WHERE {pk} = {marker}").format(
             table=self._qualified_table(schema, table),
             assignments=sql.SQL(", ").join(assignments),
             pk=sql.Identifier(self.pk_column),
+            marker=markers[-1],
         )
         return query
 
@@ -132,3 +549,30 @@ class PostgresTokenizer:
         if schema:
             return sql.SQL("{}.{}").format(sql.Identifier(schema), sql.Identifier(table))
         return sql.Identifier(table)
+
+
+def _flush_stats(conn, cur) -> None:
+    """Publish this session's table counters now, so :meth:`change_marker` sees the run's writes.
+
+    Backends otherwise report them seconds after going idle, or on PostgreSQL
+    14 and older only at their next transaction. Older servers have no
+    ``pg_stat_force_next_flush``, so an empty transaction is ended once the
+    report interval has passed, and the next reader snapshot is waited for.
+    """
+
+    if conn.server_version >= 150000:
+        cur.execute("SELECT pg_stat_force_next_flush()")
+        conn.commit()
+        return
+    time.sleep(PGSTAT_INTERVAL_SECONDS)
+    cur.execute("SELECT 1")
+    conn.commit()
+    time.sleep(PGSTAT_INTERVAL_SECONDS)
+
+
+def _tokenize_details(page: int, *, cancelled: bool, still_locked: bool) -> Optional[str]:
+    if cancelled:
+        return f"Cancelled after page {page}"
+    if still_locked:
+        return "Some rows were still locked by other transactions and were left for the next run"
+    return None
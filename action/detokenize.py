@@ -0,0 +1,105 @@
+"""Bulk detokenization with an in-process cache of hot tokens."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .token_logic import detokenize_value
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TokenVault:
+    """Lookup hook for tokens that cannot be decoded locally.
+
+    The built-in ``tok_<base64>_poc`` scheme is reversible, so the default
+    :class:`Detokenizer` never needs a vault. Schemes that store a random token
+    per value should subclass this and resolve a whole batch per call.
+    """
+
+    def lookup(self, tokens: Sequence[str]) -> Dict[str, str]:
+        """Return the original value of every token the vault knows."""
+
+        return {}
+
+
+class Detokenizer:
+    """Resolve tokens back to their original values in bulk.
+
+    Each batch is answered from the LRU cache first; the remaining tokens are
+    decoded in a single pass and anything that cannot be decoded is sent to the
+    vault in one call. Tokens that resolve to nothing map to ``None``.
+    """
+
+    def __init__(
+        self,
+        *,
+        vault: Optional[TokenVault] = None,
+        cache_size: int = 100_000,
+        max_batch: int = 10_000,
+    ) -> None:
+        self.vault = vault
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, vault: Optional[TokenVault] = None) -> "Detokenizer":
+        return cls(
+            vault=vault,
+            cache_size=int(os.getenv("DETOKENIZE_CACHE_SIZE", "100000")),
+            max_batch=int(os.getenv("DETOKENIZE_MAX_BATCH", "10000")),
+        )
+
+    def detokenize(self, tokens: Sequence[str]) -> List[Tuple[str, Optional[str]]]:
+        """Return ``(token, value)`` pairs in the order the tokens were given."""
+
+        resolved = self._cached(tokens)
+        misses = [token for token in dict.fromkeys(tokens) if token not in resolved]
+        if misses:
+            decoded = self._decode(misses)
+            if self.vault is not None:
+                unresolved = [token for token in misses if token not in decoded]
+                if unresolved:
+                    decoded.update(self.vault.lookup(unresolved))
+            self._remember(decoded)
+            resolved.update(decoded)
+        return [(token, resolved.get(token)) for token in tokens]
+
+    def iter_chunks(self, tokens: Sequence[str], chunk_size: int = 1000) -> Iterator[List[Tuple[str, Optional[str]]]]:
+        """Resolve ``tokens`` ``chunk_size`` at a time so callers can stream results."""
+
+        for start in range(0, len(tokens), chunk_size):
+            yield self.detokenize(tokens[start : start + chunk_size])
+
+    def _cached(self, tokens: Iterable[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        with self._lock:
+            for token in tokens:
+                value = self._cache.get(token)
+                if value is not None:
+                    self._cache.move_to_end(token)
+                    found[token] = value
+        return found
+
+    def _remember(self, values: Dict[str, str]) -> None:
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache.update(values)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _decode(tokens: Iterable[str]) -> Dict[str, str]:
+        decoded: Dict[str, str] = {}
+        for token in tokens:
+            try:
+                decoded[token] = detokenize_value(token)
+            except ValueError:
+                continue
+        return decoded
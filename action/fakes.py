@@ -0,0 +1,181 @@
+"""In-process stand-ins for DataHub GMS and the MetadataChangeLog topic.
+
+They let the full trigger -> tokenize -> write-back pipeline run against a
+local database only, e.g. from ``scripts/bench_pipeline.py``::
+
+    graph = FakeDataHubGraph()
+    graph.add_dataset(fake_dataset(urn, ["id", "email", "phone"]))
+    manager = RunManager(client=DataHubClient(graph=graph), pg=PostgresTokenizer.from_env())
+    consumer = MetadataChangeLogConsumer(manager)
+    for event in tag_events([urn]):
+        consumer._handle_message(event)
+"""
+from __future__ import annotations
+
+import copy
+import json
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .datahub_client import CONTAINER_DATASETS_QUERY, DATASET_QUERY
+from .mcl_consumer import TARGET_TAG
+
+
+def fake_dataset(
+    urn: str,
+    columns: Sequence[str],
+    *,
+    native_type: str = "text",
+    tags: Iterable[str] = (TARGET_TAG,),
+    container: Optional[str] = None,
+) -> dict:
+    """Build a dataset in the shape :data:`DATASET_QUERY` returns."""
+
+    return {
+        "urn": urn,
+        "name": urn,
+        "container": container,
+        "platform": {"urn": urn.split("(", 1)[1].split(",", 1)[0], "name": None},
+        "properties": {"name": urn, "description": None, "customProperties": []},
+        "editableProperties": {"description": None},
+        "schemaMetadata": {
+            "fields": [
+                {"fieldPath": column, "nativeDataType": native_type, "description": None, "globalTags": {"tags": []}}
+                for column in columns
+            ]
+        },
+        "editableSchemaMetadata": {"editableSchemaFieldInfo": []},
+        "globalTags": {"tags": [{"tag": {"urn": tag, "name": tag.split(":")[-1]}} for tag in tags]},
+    }
+
+
+class FakeDataHubGraph:
+    """Serve the action's GraphQL queries from memory and record emitted proposals.
+
+    Emitted ``editableDatasetProperties`` and ``globalTags`` aspects are applied
+    to the stored datasets, so later reads see the run summary, the state
+    digest and the rotated tags just as they would against GMS.
+    """
+
+    def __init__(self, datasets: Iterable[dict] = ()) -> None:
+        self._datasets: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.emitted: List[object] = []
+        self.graphql_calls = 0
+        self.emit_calls = 0
+        for dataset in datasets:
+            self.add_dataset(dataset)
+
+    def add_dataset(self, dataset: dict) -> None:
+        with self._lock:
+            self._datasets[dataset["urn"]] = copy.deepcopy(dataset)
+
+    def dataset(self, urn: str) -> Optional[dict]:
+        with self._lock:
+            dataset = self._datasets.get(urn)
+            return copy.deepcopy(dataset) if dataset is not None else None
+
+    def execute_graphql(self, query: str, variables: Optional[dict] = None) -> dict:
+        variables = variables or {}
+        with self._lock:
+            self.graphql_calls += 1
+        if query == DATASET_QUERY:
+            return {"dataset": self.dataset(variables["urn"])}
+        if "entities(urns: $urns)" in query:
+            # Field projection is not applied; callers only read what they asked for.
+            return {"entities": [self.dataset(urn) for urn in variables["urns"]]}
+        if query == CONTAINER_DATASETS_QUERY:
+            return {"searchAcrossEntities": self._search_container(variables["input"])}
+        raise NotImplementedError("FakeDataHubGraph does not serve this query")
+
+    def emit_mcp(self, mcp) -> None:
+        with self._lock:
+            self.emit_calls += 1
+            self._apply(mcp)
+
+    def emit_mcps(self, mcps: Sequence[object]) -> None:
+        with self._lock:
+            self.emit_calls += 1
+            for mcp in mcps:
+                self._apply(mcp)
+
+    def _apply(self, mcp) -> None:
+        self.emitted.append(mcp)
+        dataset = self._datasets.get(mcp.entityUrn)
+        if dataset is None:
+            return
+        if mcp.changeType == "PATCH":
+            if mcp.aspectName == "datasetProperties":
+                self._patch_custom_properties(dataset, json.loads(mcp.aspect.value))
+            return
+        aspect = mcp.aspect.to_obj()
+        if mcp.aspectName == "editableDatasetProperties":
+            dataset["editableProperties"] = {"description": aspect.get("description")}
+        elif mcp.aspectName == "globalTags":
+            dataset["globalTags"] = {
+                "tags": [{"tag": {"urn": item["tag"], "name": item["tag"].split(":")[-1]}} for item in aspect["tags"]]
+            }
+
+    @staticmethod
+    def _patch_custom_properties(dataset: dict, operations: List[dict]) -> None:
+        properties = {item["key"]: item["value"] for item in dataset["properties"]["customProperties"]}
+        for operation in operations:
+            section, _, key = operation["path"].strip("/").partition("/")
+            if section != "customProperties":
+                continue
+            if operation["op"] == "remove":
+                properties.pop(key, None)
+            else:
+                properties[key] = operation["value"]
+        dataset["properties"]["customProperties"] = [{"key": key, "value": value} for key, value in properties.items()]
+
+    def _search_container(self, search_input: dict) -> dict:
+        container = search_input["orFilters"][0]["and"][0]["values"][0]
+        with self._lock:
+            urns = sorted(urn for urn, dataset in self._datasets.items() if dataset.get("container") == container)
+        start = int(search_input.get("start") or 0)
+        page = urns[start : start + int(search_input.get("count") or 10)]
+        return {
+            "start": start,
+            "count": len(page),
+            "total": len(urns),
+            "searchResults": [{"entity": {"urn": urn}} for urn in page],
+        }
+
+
+def tag_event(dataset_urn: str, tags: Iterable[str] = (TARGET_TAG,)) -> dict:
+    """Build a MetadataChangeLog event announcing ``globalTags`` on a dataset."""
+
+    return _event(dataset_urn, "globalTags", {"tags": [{"tag": tag} for tag in tags]})
+
+
+def field_tag_event(dataset_urn: str, columns: Iterable[str]) -> dict:
+    """Build a MetadataChangeLog event tagging ``columns`` with the trigger tag."""
+
+    return _event(
+        dataset_urn,
+        "editableSchemaMetadata",
+        {
+            "editableSchemaFieldInfo": [
+                {"fieldPath": column, "globalTags": {"tags": [{"tag": TARGET_TAG}]}} for column in columns
+            ]
+        },
+    )
+
+
+def tag_events(dataset_urns: Sequence[str], count: Optional[int] = None) -> Iterator[dict]:
+    """Yield ``count`` trigger events cycling through ``dataset_urns``."""
+
+    total = len(dataset_urns) if count is None else count
+    for index in range(total):
+        yield tag_event(dataset_urns[index % len(dataset_urns)])
+
+
+def _event(dataset_urn: str, aspect_name: str, aspect: dict) -> dict:
+    return {
+        "entityType": "dataset",
+        "entityUrn": dataset_urn,
+        "changeType": "UPSERT",
+        "aspectName": aspect_name,
+        "aspect": {"value": json.dumps(aspect), "contentType": "application/json"},
+    }
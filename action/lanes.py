@@ -0,0 +1,118 @@
+"""Priority lanes sharing the run capacity of a platform."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .run_context import RunContext
+
+LOGGER = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+EVENT = "event"
+BULK = "bulk"
+
+# Highest priority first.
+LANES: Tuple[str, ...] = (INTERACTIVE, EVENT, BULK)
+
+
+@dataclass
+class LaneConfig:
+    reserved: Dict[str, int] = field(default_factory=lambda: {INTERACTIVE: 1, EVENT: 1})
+    preemption: bool = True
+
+    @classmethod
+    def from_env(cls) -> "LaneConfig":
+        """Read ``LANE_INTERACTIVE_RESERVED``, ``LANE_EVENT_RESERVED`` and ``LANE_PREEMPTION``."""
+
+        return cls(
+            reserved={
+                INTERACTIVE: int(os.getenv("LANE_INTERACTIVE_RESERVED", "1")),
+                EVENT: int(os.getenv("LANE_EVENT_RESERVED", "1")),
+            },
+            preemption=os.getenv("LANE_PREEMPTION", "true").lower() in {"1", "true", "yes"},
+        )
+
+
+class LaneScheduler:
+    """Hand out the ``capacity`` run slots of one platform by priority lane.
+
+    Slots reserved for a lane can only be used by that lane and the lanes
+    above it, so ``bulk`` runs never take the last ``interactive`` and
+    ``event`` slots. Free slots go to the highest-priority waiter first. When
+    a waiter still finds no slot and preemption is enabled, the lowest-priority
+    running run below it is asked to yield at its next page boundary through
+    :attr:`RunContext.preempt_event`.
+    """
+
+    def __init__(self, capacity: int, config: Optional[LaneConfig] = None) -> None:
+        self.capacity = capacity
+        self.config = config or LaneConfig()
+        self._condition = threading.Condition()
+        self._running: List[Tuple[str, Optional[RunContext]]] = []
+        self._waiting: Dict[str, int] = {lane: 0 for lane in LANES}
+
+    def limit(self, lane: str) -> int:
+        """Return how many runs may hold slots while a run of ``lane`` starts."""
+
+        above = LANES[: LANES.index(lane)]
+        return max(1, self.capacity - sum(self.config.reserved.get(higher, 0) for higher in above))
+
+    @contextmanager
+    def slot(self, lane: str, context: Optional[RunContext] = None) -> Iterator[None]:
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane {lane!r}; expected one of {', '.join(LANES)}")
+        entry = (lane, context)
+        with self._condition:
+            self._waiting[lane] += 1
+            try:
+                while not self._can_start(lane):
+                    self._preempt_for(lane)
+                    self._condition.wait()
+            finally:
+                self._waiting[lane] -= 1
+            self._running.append(entry)
+            if context is not None:
+                context.preempt_event.clear()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running.remove(entry)
+                self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._condition:
+            return {
+                lane: {
+                    "running": sum(1 for running, _ in self._running if running == lane),
+                    "waiting": self._waiting[lane],
+                    "limit": self.limit(lane),
+                }
+                for lane in LANES
+            }
+
+    def _can_start(self, lane: str) -> bool:
+        rank = LANES.index(lane)
+        if any(self._waiting[higher] for higher in LANES[:rank]):
+            return False
+        return len(self._running) < self.limit(lane)
+
+    def _preempt_for(self, lane: str) -> None:
+        if not self.config.preemption:
+            return
+        rank = LANES.index(lane)
+        candidates = [
+            (LANES.index(running), context)
+            for running, context in self._running
+            if context is not None and LANES.index(running) > rank
+        ]
+        if not candidates or any(context.preempted for _, context in candidates):
+            return
+        _, victim = max(candidates, key=lambda candidate: candidate[0])
+        LOGGER.info("Asking run %s to yield its slot to the %s lane", victim.run_id, lane)
+        victim.preempt_event.set()
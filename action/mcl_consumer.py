@@ -1,38 +1,62 @@
 """Background consumer that listens for MetadataChangeLog events."""
 from __future__ import annotations
 
+import json
 import logging
 import os
 import threading
 import time
-from typing import List, Optional, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
 
-from confluent_kafka import KafkaException
-from confluent_kafka.deserializing_consumer import DeserializingConsumer
-from confluent_kafka.schema_registry import SchemaRegistryClient
-from confluent_kafka.schema_registry.avro import AvroDeserializer
-from confluent_kafka.schema_registry.error import SchemaRegistryError
-from confluent_kafka.serialization import StringDeserializer
+from .lanes import EVENT
+from .run_manager import RunManager, _parse_dataset_urn
 
-from .run_manager import RunManager
+if TYPE_CHECKING:  # pragma: no cover - confluent_kafka is imported when the consumer starts
+    from confluent_kafka import Message, TopicPartition
+    from confluent_kafka.deserializing_consumer import DeserializingConsumer
 
 LOGGER = logging.getLogger(__name__)
 TARGET_TAG = "urn:li:tag:tokenize/run"
 TOPIC = "MetadataChangeLog_Versioned_v1"
+# Runs on these platforms hold no table lease, so their partition is only
+# handed over once the cancelled run has really stopped.
+UNLEASED_PLATFORMS = {"databricks"}
 
 
 def _unwrap_union(value: Optional[dict]) -> dict:
+    """Unwrap an Avro union branch such as ``{"com.linkedin.common.GlobalTags": {...}}``."""
+
     if isinstance(value, dict) and len(value) == 1:
-        return next(iter(value.values()))
+        branch = next(iter(value))
+        if "." in branch:
+            return value[branch]
     return value or {}
 
 
+def _decode_aspect(aspect: Optional[dict]) -> dict:
+    """Return the aspect payload, decoding the JSON ``GenericAspect`` used by MCL events."""
+
+    aspect = _unwrap_union(aspect)
+    raw = aspect.get("value")
+    if isinstance(raw, (str, bytes)) and "json" in (aspect.get("contentType") or "application/json"):
+        try:
+            decoded = json.loads(raw)
+        except ValueError:
+            LOGGER.debug("Ignoring undecodable aspect payload")
+            return {}
+        return decoded if isinstance(decoded, dict) else {}
+    return aspect
+
+
 def _extract_tags(tag_container: Optional[dict]) -> List[str]:
     tags: List[str] = []
     container = _unwrap_union(tag_container)
     for association in container.get("tags", []) or []:
-        tag = association.get("tag") or {}
-        urn = tag.get("urn")
+        tag = association.get("tag")
+        # MCL payloads carry the tag URN directly, GraphQL responses nest it.
+        urn = tag.get("urn") if isinstance(tag, dict) else tag
         if urn:
             tags.append(urn)
     return tags
@@ -54,28 +78,63 @@ class _SchemaUnavailable(RuntimeError):
     """Raised when the MetadataChangeLog schema has not been registered yet."""
 
 
+@dataclass
+class _InFlightRun:
+    message: "Message"
+    future: "Future[None]"
+    cancel_event: threading.Event
+    unleased: bool = False
+
+
 class MetadataChangeLogConsumer(threading.Thread):
-    """Consume MetadataChangeLog events and hand off to :class:`RunManager`."""
+    """Consume MetadataChangeLog events and hand off to :class:`RunManager`.
+
+    Replicas share one consumer group, so each dataset's events land on the
+    replica that owns its partition. A triggering message pauses its partition
+    while the run executes on a worker thread and its offset is only stored
+    once the run has finished; when a partition is revoked the run is cancelled
+    at its next page boundary and the message is redelivered to the new owner.
+    Postgres runs give up after ``revoke_timeout`` because their table lease
+    keeps the new owner out; Databricks runs are waited for until they stop.
+    """
 
-    def __init__(self, run_manager: RunManager, *, poll_interval: float = 1.0) -> None:
+    def __init__(
+        self,
+        run_manager: RunManager,
+        *,
+        poll_interval: float = 1.0,
+        max_in_flight: Optional[int] = None,
+        revoke_timeout: Optional[float] = None,
+    ) -> None:
         super().__init__(name="mcl-consumer", daemon=True)
         self.run_manager = run_manager
         self.poll_interval = poll_interval
+        self.max_in_flight = max_in_flight or int(os.getenv("KAFKA_MAX_IN_FLIGHT", "4"))
+        self.revoke_timeout = (
+            revoke_timeout if revoke_timeout is not None else float(os.getenv("KAFKA_REVOKE_TIMEOUT_S", "60"))
+        )
         self._stop_event = threading.Event()
         self._consumer: Optional[DeserializingConsumer] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="mcl-run")
+        self._in_flight: Dict[Tuple[str, int], _InFlightRun] = {}
 
     def stop(self) -> None:
         self._stop_event.set()
-        if self._consumer is not None:
-            self._consumer.close()
+
+    @property
+    def connected(self) -> bool:
+        return self._consumer is not None
 
     def run(self) -> None:
+        from confluent_kafka import KafkaException
+
         LOGGER.info("Starting MetadataChangeLog consumer thread")
         while not self._stop_event.is_set():
             if not self._ensure_consumer():
                 time.sleep(5.0)
                 continue
             try:
+                self._reap_finished()
                 message = self._consumer.poll(timeout=self.poll_interval)
             except KafkaException as exc:  # pragma: no cover - runtime errors
                 LOGGER.warning("Kafka poll failed: %s", exc)
@@ -87,13 +146,85 @@ class MetadataChangeLogConsumer(threading.Thread):
             if message.error():
                 LOGGER.debug("Kafka message error: %s", message.error())
                 continue
+            self._dispatch(message)
+
+        self._shutdown()
+        LOGGER.info("MetadataChangeLog consumer stopped")
 
-            value = message.value()
-            if not value:
+    def _dispatch(self, message: "Message") -> None:
+        value = message.value()
+        trigger = self._parse_trigger(value) if value else None
+        if trigger is None:
+            self._store_offset(message)
+            return
+
+        dataset_urn, columns = trigger
+        cancel_event = threading.Event()
+        future = self._executor.submit(self._trigger, dataset_urn, columns, cancel_event)
+        self._in_flight[(message.topic(), message.partition())] = _InFlightRun(
+            message, future, cancel_event, unleased=_platform(dataset_urn) in UNLEASED_PLATFORMS
+        )
+        # Later events for the same datasets wait until this run has finished.
+        self._consumer.pause([_topic_partition(message)])
+
+    def _reap_finished(self) -> None:
+        for key, entry in list(self._in_flight.items()):
+            if not entry.future.done():
                 continue
-            self._handle_message(value)
+            del self._in_flight[key]
+            self._store_offset(entry.message)
+            self._consumer.resume([_topic_partition(entry.message)])
 
-        LOGGER.info("MetadataChangeLog consumer stopped")
+    def _store_offset(self, message: "Message") -> None:
+        from confluent_kafka import KafkaException
+
+        try:
+            self._consumer.store_offsets(message=message)
+        except KafkaException as exc:  # pragma: no cover - partition already revoked
+            LOGGER.debug("Could not store offset for %s[%d]: %s", message.topic(), message.partition(), exc)
+
+    def _on_assign(self, consumer: "DeserializingConsumer", partitions: list) -> None:
+        LOGGER.info("Assigned partitions %s", sorted(partition.partition for partition in partitions))
+
+    def _on_revoke(self, consumer: "DeserializingConsumer", partitions: list) -> None:
+        from confluent_kafka import KafkaException
+
+        self._reap_finished()
+        revoked = {(partition.topic, partition.partition) for partition in partitions}
+        handed_off = [self._in_flight.pop(key) for key in list(self._in_flight) if key in revoked]
+        if handed_off:
+            LOGGER.info("Partitions revoked; cancelling %d in-flight run(s)", len(handed_off))
+            # Offsets of cancelled runs are not stored, so the new owner re-delivers them.
+            self._cancel(handed_off)
+        try:
+            consumer.commit(asynchronous=False)
+        except KafkaException as exc:
+            LOGGER.debug("No offsets committed on revoke: %s", exc)
+
+    def _shutdown(self) -> None:
+        if self._consumer is not None:
+            self._reap_finished()
+        # Popped before close() so the revoke callback cannot store their offsets.
+        cancelled = list(self._in_flight.values())
+        self._in_flight.clear()
+        self._cancel(cancelled)
+        self._executor.shutdown(wait=False)
+        if self._consumer is not None:
+            self._consumer.close()
+            self._consumer = None
+
+    def _cancel(self, entries: List[_InFlightRun]) -> None:
+        """Cancel ``entries`` and wait for them before their partitions change hands."""
+
+        for entry in entries:
+            entry.cancel_event.set()
+        wait([entry.future for entry in entries], timeout=self.revoke_timeout)
+        unleased = [entry for entry in entries if entry.unleased and not entry.future.done()]
+        if unleased:
+            LOGGER.warning(
+                "Waiting past KAFKA_REVOKE_TIMEOUT_S for %d cancelled run(s) without a table lease", len(unleased)
+            )
+            wait([entry.future for entry in unleased])
 
     def _ensure_consumer(self) -> bool:
         if self._consumer is not None:
@@ -113,11 +244,19 @@ class MetadataChangeLogConsumer(threading.Thread):
             self._consumer = None
             return False
 
-    def _build_consumer(self) -> DeserializingConsumer:
+    def _build_consumer(self) -> "DeserializingConsumer":
+        from confluent_kafka.deserializing_consumer import DeserializingConsumer
+        from confluent_kafka.schema_registry import SchemaRegistryClient
+        from confluent_kafka.schema_registry.avro import AvroDeserializer
+        from confluent_kafka.schema_registry.error import SchemaRegistryError
+        from confluent_kafka.serialization import StringDeserializer
+
         bootstrap = os.getenv("KAFKA_BOOTSTRAP_SERVER", "broker:29092")
         schema_registry_url = os.getenv("KAFKA_SCHEMA_REGISTRY_URL", "http://schema-registry:8081")
         group_id = os.getenv("KAFKA_GROUP_ID", "tokenization-action")
         offset_reset = os.getenv("KAFKA_AUTO_OFFSET_RESET", "latest")
+        assignment_strategy = os.getenv("KAFKA_ASSIGNMENT_STRATEGY", "cooperative-sticky")
+        max_poll_interval_ms = int(os.getenv("KAFKA_MAX_POLL_INTERVAL_MS", "300000"))
 
         schema_registry = SchemaRegistryClient({"url": schema_registry_url})
         try:
@@ -137,39 +276,71 @@ class MetadataChangeLogConsumer(threading.Thread):
                 "bootstrap.servers": bootstrap,
                 "group.id": group_id,
                 "auto.offset.reset": offset_reset,
+                "enable.auto.commit": True,
+                "enable.auto.offset.store": False,
+                "partition.assignment.strategy": assignment_strategy,
+                "max.poll.interval.ms": max_poll_interval_ms,
                 "key.deserializer": key_deserializer,
                 "value.deserializer": value_deserializer,
             }
         )
-        consumer.subscribe([TOPIC])
+        consumer.subscribe([TOPIC], on_assign=self._on_assign, on_revoke=self._on_revoke)
         return consumer
 
     def _handle_message(self, message: dict) -> None:
+        trigger = self._parse_trigger(message)
+        if trigger is not None:
+            self._trigger(*trigger)
+
+    def _parse_trigger(self, message: dict) -> Optional[Tuple[str, Optional[List[str]]]]:
+        """Return ``(dataset_urn, columns)`` when ``message`` requests a run."""
+
         entity_type = message.get("entityType")
         if entity_type != "dataset":
-            return
+            return None
         entity_urn = message.get("entityUrn")
         aspect_name = message.get("aspectName")
-        aspect = _unwrap_union(message.get("aspect"))
+        aspect = _decode_aspect(message.get("aspect"))
         change_type = message.get("changeType")
 
         if not entity_urn or change_type not in {"UPSERT", "PATCH"}:
-            return
+            return None
 
         if aspect_name == "globalTags":
             tags = _extract_tags(aspect)
             if TARGET_TAG in tags:
                 LOGGER.info("Detected dataset tag trigger for %s", entity_urn)
-                self._trigger(entity_urn, None)
+                return entity_urn, None
         elif aspect_name == "editableSchemaMetadata":
             columns = _extract_field_columns(aspect)
             if columns:
                 LOGGER.info("Detected field tag trigger for %s columns=%s", entity_urn, columns)
-                self._trigger(entity_urn, columns)
+                return entity_urn, columns
+        return None
 
-    def _trigger(self, dataset_urn: str, columns: Optional[Sequence[str]]) -> None:
+    def _trigger(
+        self,
+        dataset_urn: str,
+        columns: Optional[Sequence[str]],
+        cancel_event: Optional[threading.Event] = None,
+    ) -> None:
         try:
-            response = self.run_manager.trigger(dataset_urn, columns=columns)
-            LOGGER.info("Triggered run %s for %s", response.get("run_id"), dataset_urn)
+            response = self.run_manager.trigger(dataset_urn, columns=columns, cancel_event=cancel_event, lane=EVENT)
+            LOGGER.info(
+                "Triggered run %s for %s (status %s)", response.get("run_id"), dataset_urn, response.get("status")
+            )
         except Exception as exc:  # pragma: no cover - runtime failure
             LOGGER.exception("Failed to execute tokenization run for %s: %s", dataset_urn, exc)
+
+
+def _platform(dataset_urn: str) -> Optional[str]:
+    try:
+        return _parse_dataset_urn(dataset_urn)[0]
+    except ValueError:
+        return None
+
+
+def _topic_partition(message: "Message") -> "TopicPartition":
+    from confluent_kafka import TopicPartition
+
+    return TopicPartition(message.topic(), message.partition())
@@ -0,0 +1,173 @@
+"""Routing of Postgres datasets to per-database connection settings."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Mapping, Optional, Union
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .db_pg import PostgresTokenizer
+
+LOGGER = logging.getLogger(__name__)
+
+DATABASE_PLACEHOLDER = "{database}"
+
+
+@dataclass(frozen=True)
+class PostgresRoute:
+    name: str
+    conn_str: str
+    max_concurrency: int
+    pool_size: int
+
+
+class PostgresRouter:
+    """Map DataHub platform instances and databases to their own tokenizer.
+
+    Route keys are ``<instance>.<database>``, ``<instance>.*``, ``<database>``
+    and ``*``, tried in that order, so a dataset on a known instance never
+    falls through to a same-named database on another server. A ``{database}`` placeholder in a route's
+    ``conn_str`` lets one route serve every database on a server. Each
+    database it resolves still gets its own pool and concurrency cap.
+    Tokenizers are built on first use. Their connection pools are closed once
+    they have been idle for ``idle_close_seconds`` and are reopened on demand.
+    """
+
+    def __init__(
+        self,
+        routes: Mapping[str, Union[str, Mapping[str, object]]],
+        *,
+        default_concurrency: int = 4,
+        idle_close_seconds: float = 300.0,
+        factory: Optional[Callable[[PostgresRoute], "PostgresTokenizer"]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.routes: Dict[str, Mapping[str, object]] = {
+            key: {"conn_str": config} if isinstance(config, str) else dict(config) for key, config in routes.items()
+        }
+        self.default_concurrency = default_concurrency
+        self.idle_close_seconds = idle_close_seconds
+        self._factory = factory or _build_tokenizer
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokenizers: Dict[str, "PostgresTokenizer"] = {}
+        self._users: Dict[str, int] = {}
+        self._last_used: Dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["PostgresRouter"]:
+        """Read routes from ``PG_ROUTES`` (JSON) or the JSON file ``PG_ROUTES_FILE``.
+
+        ``PG_CONN_STR`` becomes the ``*`` route unless one is configured.
+        Returns ``None`` when no route is configured at all.
+        """
+
+        routes: Dict[str, Union[str, Mapping[str, object]]] = {}
+        routes_file = os.getenv("PG_ROUTES_FILE")
+        if routes_file:
+            with open(routes_file, encoding="utf-8") as handle:
+                routes.update(json.load(handle))
+        if os.getenv("PG_ROUTES"):
+            routes.update(json.loads(os.environ["PG_ROUTES"]))
+        if os.getenv("PG_CONN_STR"):
+            routes.setdefault("*", os.environ["PG_CONN_STR"])
+        if not routes:
+            return None
+        return cls(
+            routes,
+            default_concurrency=int(os.getenv("PG_MAX_CONCURRENCY", "4")),
+            idle_close_seconds=float(os.getenv("PG_ROUTE_IDLE_CLOSE_S", "300")),
+        )
+
+    @classmethod
+    def single(cls, tokenizer: "PostgresTokenizer") -> "PostgresRouter":
+        """Route every database to ``tokenizer``, e.g. one built by the caller."""
+
+        router = cls(
+            {"*": tokenizer.conn_str},
+            default_concurrency=int(os.getenv("PG_MAX_CONCURRENCY", "4")),
+            idle_close_seconds=0,
+        )
+        router._tokenizers[router.route(None, "").name] = tokenizer
+        return router
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.routes)
+
+    def route(self, instance: Optional[str], database: str) -> PostgresRoute:
+        """Resolve the route serving ``database`` (on platform instance ``instance``)."""
+
+        candidates = [database]
+        if instance:
+            candidates = [f"{instance}.{database}", f"{instance}.*", database]
+        candidates.append("*")
+        for key in candidates:
+            config = self.routes.get(key)
+            if config is None:
+                continue
+            conn_str = str(config["conn_str"])
+            # The key itself, so no configured route can share the fallback's pool and slots.
+            name = key
+            if DATABASE_PLACEHOLDER in conn_str:
+                conn_str = conn_str.replace(DATABASE_PLACEHOLDER, database)
+                name = f"{instance}.{database}" if instance else database
+            max_concurrency = int(config.get("max_concurrency") or self.default_concurrency)
+            return PostgresRoute(
+                name=name,
+                conn_str=conn_str,
+                max_concurrency=max_concurrency,
+                pool_size=int(config.get("pool_size") or max_concurrency + 1),
+            )
+        target = f"{instance}.{database}" if instance else database
+        raise RuntimeError(f"No Postgres route configured for database {target!r}")
+
+    @contextmanager
+    def tokenizer(self, instance: Optional[str], database: str) -> Iterator["PostgresTokenizer"]:
+        """Yield the tokenizer of the route serving ``database``, building it on first use."""
+
+        route = self.route(instance, database)
+        with self._lock:
+            tokenizer = self._tokenizers.get(route.name)
+            if tokenizer is None:
+                LOGGER.info("Opening Postgres route %s (pool %d)", route.name, route.pool_size)
+                tokenizer = self._tokenizers[route.name] = self._factory(route)
+            self._users[route.name] = self._users.get(route.name, 0) + 1
+        try:
+            yield tokenizer
+        finally:
+            with self._lock:
+                self._users[route.name] -= 1
+                self._last_used[route.name] = self._clock()
+            self._close_idle()
+
+    def close(self) -> None:
+        """Close the pools of every route."""
+
+        with self._lock:
+            tokenizers = list(self._tokenizers.values())
+        for tokenizer in tokenizers:
+            tokenizer.close()
+
+    def _close_idle(self) -> None:
+        if not self.idle_close_seconds:
+            return
+        now = self._clock()
+        with self._lock:
+            # Closed under the lock so no run can pick the tokenizer up halfway through.
+            for name, last_used in list(self._last_used.items()):
+                if not self._users.get(name) and now - last_used >= self.idle_close_seconds:
+                    LOGGER.info("Closing idle Postgres pool for route %s", name)
+                    self._tokenizers[name].close()
+                    del self._last_used[name]
+
+
+def _build_tokenizer(route: PostgresRoute) -> "PostgresTokenizer":
+    from .db_pg import PostgresTokenizer
+
+    return PostgresTokenizer.from_env(conn_str=route.conn_str, pool_size=route.pool_size)
@@ -4,6 +4,9 @@ from __future__ import annotations
 import re
 from typing import Iterable, List, Optional, Sequence, Set
 
+# Field-level tag written at ingestion time on every column to tokenize.
+COLUMN_TAG = "urn:li:tag:tokenize/column"
+
 
 class PIIDetector:
     """Detect PII columns using DataHub tags and naming heuristics."""
@@ -61,6 +64,35 @@ class PIIDetector:
         ordered = tagged_columns + [col for col in fallback_columns if col not in tagged_columns]
         return ordered
 
+    def select(self, schema_fields: Sequence[dict], override_columns: Optional[Iterable[str]] = None) -> List[str]:
+        """Return the columns to tokenize, preferring ingestion-time annotations.
+
+        Columns tagged with :data:`COLUMN_TAG` were already classified during
+        ingestion, so the naming heuristics are skipped for annotated
+        datasets. Columns tagged as PII after ingestion are still included.
+        """
+
+        if not override_columns and self.annotated_columns(schema_fields):
+            selected_tags = self.pii_tags | {COLUMN_TAG}
+            return list(
+                dict.fromkeys(
+                    field["fieldPath"].split(".")[-1]
+                    for field in schema_fields
+                    if field.get("fieldPath") and selected_tags.intersection(self._extract_tags(field))
+                )
+            )
+        return self.detect(schema_fields, override_columns=override_columns)
+
+    @classmethod
+    def annotated_columns(cls, schema_fields: Sequence[dict]) -> List[str]:
+        """Return the columns carrying :data:`COLUMN_TAG`, in schema order."""
+
+        return [
+            field["fieldPath"].split(".")[-1]
+            for field in schema_fields
+            if field.get("fieldPath") and COLUMN_TAG in cls._extract_tags(field)
+        ]
+
     @staticmethod
     def _extract_tags(field: dict) -> Set[str]:
         tags: Set[str] = set()
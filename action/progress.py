@@ -0,0 +1,159 @@
+"""Live progress of running tokenizations, fanned out to API subscribers."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .types import PageProgress
+
+LOGGER = logging.getLogger(__name__)
+
+PROGRESS_PROPERTY = "tokenization_progress"
+
+
+class Subscription:
+    """Queue of progress events for one subscriber, optionally filtered by run or dataset."""
+
+    def __init__(
+        self,
+        *,
+        run_id: Optional[str] = None,
+        dataset: Optional[str] = None,
+        max_events: int = 1000,
+    ) -> None:
+        self.run_id = run_id
+        self.dataset = dataset
+        self.events: "queue.Queue[dict]" = queue.Queue(maxsize=max_events)
+
+    def matches(self, event: dict) -> bool:
+        return (self.run_id is None or event.get("run_id") == self.run_id) and (
+            self.dataset is None or event.get("dataset") == self.dataset
+        )
+
+    def put(self, event: dict) -> None:
+        """Deliver ``event``, dropping the oldest queued one if the subscriber lags behind."""
+
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get_nowait(self) -> Optional[dict]:
+        try:
+            return self.events.get_nowait()
+        except queue.Empty:
+            return None
+
+
+class ProgressHub:
+    """Publish progress events and remember the latest one of every active run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: List[Subscription] = []
+        self._active: Dict[str, dict] = {}
+
+    def publish(self, event: dict) -> None:
+        with self._lock:
+            if event.get("final"):
+                self._active.pop(event["run_id"], None)
+            else:
+                self._active[event["run_id"]] = event
+            subscriptions = [subscription for subscription in self._subscriptions if subscription.matches(event)]
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self, *, run_id: Optional[str] = None, dataset: Optional[str] = None) -> Subscription:
+        subscription = Subscription(run_id=run_id, dataset=dataset)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def active(self, *, run_id: Optional[str] = None, dataset: Optional[str] = None) -> List[dict]:
+        """Return the latest event of every running run matching the filters."""
+
+        probe = Subscription(run_id=run_id, dataset=dataset, max_events=1)
+        with self._lock:
+            return [event for event in self._active.values() if probe.matches(event)]
+
+
+class ProgressReporter:
+    """Page listener that publishes progress events and writes periodic checkpoints.
+
+    Rates are based on rows scanned; the ETA is only reported when the run
+    started with an estimate of the rows left to tokenize. ``checkpoint`` is
+    called with the current event at most every ``checkpoint_interval``
+    seconds (never when the interval is 0).
+    """
+
+    def __init__(
+        self,
+        hub: ProgressHub,
+        run_id: str,
+        dataset_urn: str,
+        *,
+        estimated_rows: Optional[int] = None,
+        checkpoint: Optional[Callable[[dict], None]] = None,
+        checkpoint_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.hub = hub
+        self.run_id = run_id
+        self.dataset_urn = dataset_urn
+        self.estimated_rows = estimated_rows
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpointed = False
+        self._clock = clock
+        self._last_checkpoint = clock()
+        self._last_event: Optional[dict] = None
+
+    def __call__(self, progress: PageProgress) -> None:
+        elapsed = progress.elapsed_seconds
+        rate = progress.rows_scanned / elapsed if elapsed > 0 else None
+        eta = None
+        if rate and self.estimated_rows is not None:
+            eta = max(self.estimated_rows - progress.rows_scanned, 0) / rate
+        event = {
+            "run_id": self.run_id,
+            "dataset": self.dataset_urn,
+            "status": "RUNNING",
+            "page": progress.page,
+            "rows_scanned": progress.rows_scanned,
+            "rows_updated": progress.rows_updated,
+            "last_pk": progress.last_pk,
+            "rows_per_second": rate,
+            "estimated_rows": self.estimated_rows,
+            "eta_seconds": eta,
+            "elapsed_seconds": elapsed,
+        }
+        self._last_event = event
+        self.hub.publish(event)
+
+        now = self._clock()
+        if self.checkpoint is None or not self.checkpoint_interval:
+            return
+        if now - self._last_checkpoint >= self.checkpoint_interval:
+            self._last_checkpoint = now
+            self.checkpoint(event)
+            self.checkpointed = True
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        """Publish the final event of the run."""
+
+        event = dict(self._last_event or {"run_id": self.run_id, "dataset": self.dataset_urn})
+        event.update({"status": status, "error": error, "eta_seconds": None, "final": True})
+        self.hub.publish(event)
@@ -0,0 +1,68 @@
+"""Per-run context handed to the tokenizers."""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, List, Optional
+
+from .types import PageProgress
+
+LOGGER = logging.getLogger(__name__)
+
+PageListener = Callable[[PageProgress], None]
+
+
+class LeaseUnavailable(RuntimeError):
+    """Raised when another worker holds the lease on the target table."""
+
+
+class RunContext:
+    """State shared between :class:`RunManager` and a tokenizer for one run.
+
+    Tokenizers start scanning after :attr:`position` (initially
+    ``resume_after``), call :meth:`page_committed` once every page has been
+    committed and stop at the next page boundary once :attr:`should_stop` is
+    set. A run is only complete if it started from the beginning of the
+    table, i.e. ``resume_after`` was not set. Scans that resume a preempted
+    run of the same context only move ``position``.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        dataset_urn: str,
+        *,
+        resume_after: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> None:
+        self.run_id = run_id
+        self.dataset_urn = dataset_urn
+        self.resume_after = resume_after
+        self.position = resume_after
+        self.cancel_event = cancel_event or threading.Event()
+        self.preempt_event = threading.Event()
+        self._listeners: List[PageListener] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def preempted(self) -> bool:
+        """Whether a higher-priority run asked this one to give up its slot."""
+
+        return self.preempt_event.is_set()
+
+    @property
+    def should_stop(self) -> bool:
+        return self.cancelled or self.preempted
+
+    def add_listener(self, listener: PageListener) -> None:
+        self._listeners.append(listener)
+
+    def page_committed(self, progress: PageProgress) -> None:
+        for listener in self._listeners:
+            try:
+                listener(progress)
+            except Exception as exc:  # pragma: no cover - listeners must not abort a run
+                LOGGER.warning("Page listener failed for run %s: %s", self.run_id, exc)
@@ -0,0 +1,221 @@
+"""Append-only local journal of tokenization runs backed by SQLite."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+from .types import PageProgress, TokenizationResult
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join("data", "run_journal.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_entries (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    status TEXT,
+    columns TEXT,
+    last_pk TEXT,
+    rows_scanned INTEGER NOT NULL DEFAULT 0,
+    rows_updated INTEGER NOT NULL DEFAULT 0,
+    duration_seconds REAL,
+    payload TEXT,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS run_entries_dataset ON run_entries (dataset, seq);
+CREATE INDEX IF NOT EXISTS run_entries_run ON run_entries (run_id, seq);
+"""
+
+
+class RunJournal:
+    """Record run lifecycle entries and page checkpoints.
+
+    Entries are only ever appended: a run is a ``started`` entry, zero or more
+    ``checkpoint`` entries written after each committed page, and a
+    ``finished`` entry. Status, resume points and throughput history are all
+    derived from those rows.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> "RunJournal":
+        return cls(os.getenv("RUN_JOURNAL_PATH", DEFAULT_PATH))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def record_start(self, run_id: str, dataset: str, columns: Sequence[str], *, resume_after: Optional[str] = None) -> None:
+        self._append(run_id, dataset, "started", columns=columns, last_pk=resume_after)
+
+    def record_checkpoint(self, run_id: str, dataset: str, progress: PageProgress) -> None:
+        self._append(
+            run_id,
+            dataset,
+            "checkpoint",
+            last_pk=progress.last_pk,
+            rows_scanned=progress.rows_scanned,
+            rows_updated=progress.rows_updated,
+            duration_seconds=progress.elapsed_seconds,
+        )
+
+    def record_finish(
+        self,
+        run_id: str,
+        dataset: str,
+        status: str,
+        columns: Sequence[str],
+        results: Sequence[TokenizationResult],
+        duration_seconds: float,
+        error_message: Optional[str] = None,
+    ) -> None:
+        self._append(
+            run_id,
+            dataset,
+            "finished",
+            status=status,
+            columns=columns,
+            last_pk=results[-1].last_pk if results else None,
+            rows_scanned=sum(result.rows_scanned for result in results),
+            rows_updated=sum(result.rows_updated for result in results),
+            duration_seconds=duration_seconds,
+            payload={"results": [result.__dict__ for result in results], "error": error_message},
+        )
+
+    def run_status(self, run_id: str) -> Optional[Dict[str, object]]:
+        """Return the latest known state of ``run_id``."""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM run_entries WHERE run_id = ? ORDER BY seq", (run_id,)
+            ).fetchall()
+        if not rows:
+            return None
+        return _summarize(rows)
+
+    def history(self, dataset: str, limit: int = 20) -> List[Dict[str, object]]:
+        """Return the most recent runs for ``dataset``, newest first."""
+
+        with self._lock:
+            run_ids = [
+                row["run_id"]
+                for row in self._conn.execute(
+                    "SELECT run_id FROM run_entries WHERE dataset = ? AND kind = 'started' ORDER BY seq DESC LIMIT ?",
+                    (dataset, limit),
+                )
+            ]
+        return [status for status in (self.run_status(run_id) for run_id in run_ids) if status]
+
+    def resume_point(self, dataset: str, columns: Sequence[str]) -> Optional[str]:
+        """Return the last committed primary key of an unfinished run over the same columns."""
+
+        with self._lock:
+            started = self._conn.execute(
+                "SELECT run_id, columns FROM run_entries WHERE dataset = ? AND kind = 'started' "
+                "ORDER BY seq DESC LIMIT 1",
+                (dataset,),
+            ).fetchone()
+            if started is None or sorted(json.loads(started["columns"] or "[]")) != sorted(columns):
+                return None
+            succeeded = self._conn.execute(
+                "SELECT 1 FROM run_entries WHERE run_id = ? AND kind = 'finished' AND status = 'SUCCESS'",
+                (started["run_id"],),
+            ).fetchone()
+            if succeeded is not None:
+                return None
+            latest = self._conn.execute(
+                "SELECT last_pk FROM run_entries WHERE run_id = ? AND last_pk IS NOT NULL "
+                "ORDER BY seq DESC LIMIT 1",
+                (started["run_id"],),
+            ).fetchone()
+        return latest["last_pk"] if latest is not None else None
+
+    def throughput(self, dataset: str, window: int = 5) -> Optional[float]:
+        """Return average rows/second scanned over the last ``window`` successful runs."""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rows_scanned, duration_seconds FROM run_entries "
+                "WHERE dataset = ? AND kind = 'finished' AND status = 'SUCCESS' AND rows_scanned > 0 "
+                "ORDER BY seq DESC LIMIT ?",
+                (dataset, window),
+            ).fetchall()
+        total_rows = sum(row["rows_scanned"] for row in rows)
+        total_seconds = sum(row["duration_seconds"] or 0.0 for row in rows)
+        if total_rows <= 0 or total_seconds <= 0:
+            return None
+        return total_rows / total_seconds
+
+    def _append(
+        self,
+        run_id: str,
+        dataset: str,
+        kind: str,
+        *,
+        status: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        last_pk: Optional[str] = None,
+        rows_scanned: int = 0,
+        rows_updated: int = 0,
+        duration_seconds: Optional[float] = None,
+        payload: Optional[dict] = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO run_entries (run_id, dataset, kind, status, columns, last_pk, rows_scanned, "
+                "rows_updated, duration_seconds, payload, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    dataset,
+                    kind,
+                    status,
+                    None if columns is None else json.dumps(list(columns)),
+                    last_pk,
+                    rows_scanned,
+                    rows_updated,
+                    duration_seconds,
+                    None if payload is None else json.dumps(payload),
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+
+
+def _summarize(rows: Sequence[sqlite3.Row]) -> Dict[str, object]:
+    started = rows[0]
+    latest = rows[-1]
+    finished = latest if latest["kind"] == "finished" else None
+    payload = json.loads(finished["payload"]) if finished is not None and finished["payload"] else {}
+    return {
+        "run_id": started["run_id"],
+        "dataset": started["dataset"],
+        "status": finished["status"] if finished is not None else "RUNNING",
+        "columns": json.loads(started["columns"] or "[]"),
+        "resumed_after": started["last_pk"],
+        "last_pk": latest["last_pk"],
+        "rows_scanned": latest["rows_scanned"],
+        "rows_updated": latest["rows_updated"],
+        "duration_seconds": latest["duration_seconds"],
+        "started_at": started["recorded_at"],
+        "updated_at": latest["recorded_at"],
+        "results": payload.get("results", []),
+        "error": payload.get("error"),
+    }
@@ -3,95 +3,349 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Sequence
+from typing import TYPE_CHECKING, Callable, ContextManager, Dict, List, Optional, Sequence, Tuple
 
-from .datahub_client import DataHubClient
-from .db_dbx import DatabricksTokenizer
-from .db_pg import PostgresTokenizer
+from .batching import merge_batch_summaries
+from .lanes import BULK, EVENT, INTERACTIVE, LaneConfig, LaneScheduler
+from .pg_routing import PostgresRouter
 from .pii_detector import PIIDetector
-from .types import TokenizationResult
+from .progress import PROGRESS_PROPERTY, ProgressHub, ProgressReporter
+from .run_context import LeaseUnavailable, RunContext
+from .run_journal import RunJournal
+from .state import STATE_PROPERTY, DatasetState, schema_digest
+from .types import TokenizationEstimate, TokenizationResult
+
+if TYPE_CHECKING:  # pragma: no cover - imported lazily at runtime
+    from datahub.emitter.mcp import MetadataChangeProposalWrapper
+
+    from .datahub_client import DataHubClient, Proposal
+    from .db_dbx import DatabricksTokenizer
+    from .db_pg import PostgresTokenizer
 
 LOGGER = logging.getLogger(__name__)
 
 RUN_TAG = "urn:li:tag:tokenize/run"
 DONE_TAG = "urn:li:tag:tokenize/done"
 STATUS_PREFIX = "urn:li:tag:tokenize/status:"
+# Aspects fetched per batch: dry runs read the schema for PII detection and
+# properties for throughput; real runs also read the state digest in
+# properties and rotate globalTags.
+ESTIMATE_FIELDS = ("schemaMetadata", "editableSchemaMetadata", "properties")
+RUN_FIELDS = ESTIMATE_FIELDS + ("globalTags",)
 
 
 class RunManager:
-    """Entry point shared by MCL consumer and API trigger."""
+    """Entry point shared by MCL consumer and API trigger.
+
+    The DataHub client, the platform tokenizers and the run journal are built
+    on first use so that importing and constructing the manager never touches
+    GMS, loads the database drivers or creates files. Passing ``client``,
+    ``pg``, ``dbx`` or ``journal`` replaces the corresponding backend, e.g.
+    with the stand-ins from :mod:`action.fakes`.
+    """
 
-    def __init__(self) -> None:
-        self.client = DataHubClient()
+    def __init__(
+        self,
+        *,
+        client: Optional["DataHubClient"] = None,
+        pg: Optional["PostgresTokenizer"] = None,
+        dbx: Optional["DatabricksTokenizer"] = None,
+        journal: Optional[RunJournal] = None,
+    ) -> None:
         self.detector = PIIDetector()
+        self.progress = ProgressHub()
+        self._progress_checkpoint_seconds = float(os.getenv("PROGRESS_CHECKPOINT_S", "60"))
         self._lock = threading.Lock()
-        try:
-            self.pg = PostgresTokenizer.from_env()
-        except RuntimeError as exc:  # pragma: no cover - configuration validated in runtime environment
-            LOGGER.warning("Postgres tokenizer disabled: %s", exc)
-            self.pg = None
-        self.dbx = DatabricksTokenizer.from_env()
+        self._init_lock = threading.Lock()
+        self._backends: Dict[str, object] = {
+            name: backend
+            for name, backend in (
+                ("datahub", client),
+                ("postgres", PostgresRouter.single(pg) if pg is not None else None),
+                ("databricks", dbx),
+                ("journal", journal),
+            )
+            if backend is not None
+        }
+        self._dataset_locks: Dict[str, threading.Lock] = {}
+        self._platform_limits = {
+            "postgres": int(os.getenv("PG_MAX_CONCURRENCY", "4")),
+            "databricks": int(os.getenv("DBX_MAX_CONCURRENCY", "2")),
+        }
+        self._lane_config = LaneConfig.from_env()
+        # Keyed by platform, and by route for Postgres: "postgres/<route>".
+        self._lanes: Dict[str, LaneScheduler] = {}
 
-    def trigger(self, dataset_urn: str, columns: Optional[Sequence[str]] = None) -> Dict[str, object]:
-        with self._lock:
+    @property
+    def client(self) -> "DataHubClient":
+        return self._backend("datahub", _build_client)
+
+    @property
+    def pg(self) -> Optional[PostgresRouter]:
+        return self._backend("postgres", _build_pg)
+
+    @property
+    def dbx(self) -> "DatabricksTokenizer":
+        return self._backend("databricks", _build_dbx)
+
+    @property
+    def journal(self) -> RunJournal:
+        return self._backend("journal", RunJournal.from_env)
+
+    def backend_status(self) -> Dict[str, str]:
+        """Report each lazily initialized backend as ``cold``, ``ready`` or ``disabled``."""
+
+        status: Dict[str, str] = {}
+        for name in ("datahub", "postgres", "databricks"):
+            if name not in self._backends:
+                status[name] = "cold"
+            else:
+                backend = self._backends[name]
+                status[name] = "ready" if backend is not None and getattr(backend, "enabled", True) else "disabled"
+        return status
+
+    def close(self) -> None:
+        """Release pooled database connections and the run journal."""
+
+        pg = self._backends.get("postgres")
+        if pg is not None:
+            pg.close()
+        journal = self._backends.get("journal")
+        if journal is not None:
+            journal.close()
+
+    def _backend(self, name: str, factory: Callable[[], object]):
+        if name not in self._backends:
+            with self._init_lock:
+                if name not in self._backends:
+                    LOGGER.info("Initializing %s backend", name)
+                    self._backends[name] = factory()
+        return self._backends[name]
+
+    def trigger(
+        self,
+        dataset_urn: str,
+        columns: Optional[Sequence[str]] = None,
+        *,
+        dry_run: bool = False,
+        cancel_event: Optional[threading.Event] = None,
+        lane: str = INTERACTIVE,
+    ) -> Dict[str, object]:
+        """Tokenize one dataset.
+
+        Setting ``cancel_event`` stops the run at the next page boundary; the
+        run is then reported as ``CANCELLED`` and keeps its ``tokenize/run`` tag.
+        ``lane`` is the priority class competing for the platform's run slots:
+        ``interactive`` (manual triggers), ``event`` or ``bulk``.
+        """
+
+        if dry_run:
+            return self.estimate(dataset_urn, columns=columns)
+        response, proposals = self._run(dataset_urn, columns, cancel_event=cancel_event, lane=lane)
+        self.client.emit_batch(proposals)
+        return response
+
+    def trigger_many(
+        self,
+        dataset_urns: Sequence[str] = (),
+        columns: Optional[Sequence[str]] = None,
+        *,
+        container_urn: Optional[str] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, object]:
+        """Tokenize several datasets concurrently and write results back in one batch.
+
+        Datasets run in parallel up to the caps configured by
+        ``PG_MAX_CONCURRENCY`` (or per Postgres route) and
+        ``DBX_MAX_CONCURRENCY``. When
+        ``container_urn`` is given, every dataset inside the container is
+        added to ``dataset_urns``. Metadata of all datasets is fetched up front
+        in batched GraphQL requests, projected to the aspects a run (or, with
+        ``dry_run``, an estimate) reads, instead of one request per dataset. Batch runs use
+        the ``bulk`` lane and yield to interactive and event-driven runs.
+        """
+
+        urns = list(dataset_urns)
+        if container_urn:
+            urns.extend(self.client.list_container_datasets(container_urn))
+        urns = list(dict.fromkeys(urns))
+        batch_id = str(uuid.uuid4())
+        started_at = datetime.now(timezone.utc)
+        LOGGER.info("Starting batch %s for %d datasets", batch_id, len(urns))
+
+        responses: List[Dict[str, object]] = []
+        proposals: List["Proposal"] = []
+        datasets = self.client.get_datasets(urns, ESTIMATE_FIELDS if dry_run else RUN_FIELDS) if urns else {}
+        max_workers = max(1, min(len(urns), self._batch_capacity(urns)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tokenize") as pool:
+            futures = {
+                (
+                    pool.submit(self.estimate, urn, columns, dataset=datasets.get(urn))
+                    if dry_run
+                    else pool.submit(self._run, urn, columns, dataset=datasets.get(urn), lane=BULK)
+                ): urn
+                for urn in urns
+            }
+            for future in as_completed(futures):
+                urn = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as exc:  # pragma: no cover - runtime failure surface
+                    LOGGER.exception("Batch %s failed for %s", batch_id, urn)
+                    responses.append({"dataset": urn, "status": "FAILED", "error": str(exc)})
+                    continue
+                if dry_run:
+                    responses.append(outcome)
+                else:
+                    response, dataset_proposals = outcome
+                    responses.append(response)
+                    proposals.extend(dataset_proposals)
+
+        self.client.emit_batch(proposals)
+        finished_at = datetime.now(timezone.utc)
+        positions = {urn: index for index, urn in enumerate(urns)}
+        responses.sort(key=lambda response: positions[response["dataset"]])
+        statuses = {response["status"] for response in responses}
+        if statuses <= {"SUCCESS", "SKIPPED", "BUSY", "DRY_RUN"}:
+            status = "DRY_RUN" if dry_run else "SUCCESS"
+        elif statuses == {"FAILED"}:
+            status = "FAILED"
+        else:
+            status = "PARTIAL"
+        summary: Dict[str, object] = {
+            "batch_id": batch_id,
+            "status": status,
+            "datasets": urns,
+            "runs": responses,
+            "started_at": started_at.isoformat(),
+            "finished_at": finished_at.isoformat(),
+            "duration_seconds": (finished_at - started_at).total_seconds(),
+        }
+        if dry_run:
+            summary["estimated_rows"] = sum(int(response.get("estimated_rows") or 0) for response in responses)
+        else:
+            summary["rows_scanned"] = sum(int(response.get("rows_scanned") or 0) for response in responses)
+            summary["rows_updated"] = sum(int(response.get("rows_updated") or 0) for response in responses)
+        return summary
+
+    def _run(
+        self,
+        dataset_urn: str,
+        columns: Optional[Sequence[str]] = None,
+        *,
+        cancel_event: Optional[threading.Event] = None,
+        dataset: Optional[dict] = None,
+        lane: str = INTERACTIVE,
+    ) -> Tuple[Dict[str, object], List["Proposal"]]:
+        """Execute one dataset run and return its response plus pending DataHub writes.
+
+        ``dataset`` is metadata already fetched by the caller; it is read from
+        DataHub when omitted. When a higher-priority run preempts this one, it
+        gives up its slot at the next page boundary and continues from where it
+        stopped once it gets a slot again; the segments are reported as one
+        result.
+        """
+
+        with self._dataset_lock(dataset_urn):
             run_id = str(uuid.uuid4())
             started_at = datetime.now(timezone.utc)
             LOGGER.info("Starting tokenization run %s for %s", run_id, dataset_urn)
 
-            dataset = self.client.get_dataset(dataset_urn)
+            if dataset is None:
+                dataset = self.client.get_dataset(dataset_urn)
             schema_fields = self.client.extract_schema_fields(dataset)
-            selected_columns = self.detector.detect(schema_fields, override_columns=columns)
+            selected_columns = self.detector.select(schema_fields, override_columns=columns)
             platform, dataset_key, _env = _parse_dataset_urn(dataset_urn)
 
+            schema_hash = schema_digest(schema_fields)
+            change_marker = self._change_marker(platform, dataset_key)
+            previous_state = DatasetState.from_json(
+                self.client.extract_custom_properties(dataset).get(STATE_PROPERTY)
+            )
+            if previous_state and previous_state.covers(selected_columns, schema_hash, change_marker):
+                return self._skip(dataset, dataset_urn, selected_columns, previous_state, started_at)
+
+            resume_after = self.journal.resume_point(dataset_urn, selected_columns)
+            if resume_after is not None:
+                LOGGER.info("Resuming %s after primary key %s", dataset_urn, resume_after)
+            context = RunContext(run_id, dataset_urn, resume_after=resume_after, cancel_event=cancel_event)
+            context.add_listener(lambda progress: self.journal.record_checkpoint(run_id, dataset_urn, progress))
+            reporter = ProgressReporter(
+                self.progress,
+                run_id,
+                dataset_urn,
+                estimated_rows=self._estimated_rows(platform, dataset_key, selected_columns),
+                checkpoint=lambda event: self._checkpoint_progress(dataset_urn, event),
+                checkpoint_interval=self._progress_checkpoint_seconds,
+            )
+            context.add_listener(reporter)
+            self.journal.record_start(run_id, dataset_urn, selected_columns, resume_after=resume_after)
+
             results: List[TokenizationResult] = []
             status = "SUCCESS"
             error_message: Optional[str] = None
 
             try:
-                if platform == "postgres":
-                    if not self.pg:
-                        raise RuntimeError("Postgres tokenizer not configured")
-                    database, schema, table = _split_dataset_key(dataset_key)
-                    result = self.pg.tokenize(
-                        database=database,
-                        schema=schema,
-                        table=table,
-                        columns=selected_columns,
-                    )
-                    results.append(result)
-                elif platform == "databricks":
-                    if not getattr(self.dbx, "enabled", False):
-                        raise RuntimeError("Databricks tokenizer not configured")
-                    database, schema, table = _split_dataset_key(dataset_key)
-                    result = self.dbx.tokenize(
-                        catalog=database,
-                        schema=schema,
-                        table=table,
-                        columns=selected_columns,
-                    )
-                    results.append(result)
-                else:
-                    raise RuntimeError(f"Unsupported platform: {platform}")
+                results.append(self._tokenize_in_lane(platform, dataset_key, selected_columns, context, lane))
+                if context.cancelled and not all(result.complete for result in results):
+                    status = "CANCELLED"
+            except LeaseUnavailable as exc:
+                status = "BUSY"
+                error_message = str(exc)
+                LOGGER.info("Tokenization run %s not started: %s", run_id, exc)
+            except _HandedOff as exc:
+                # The pages this run committed are reported, but the table is not done.
+                results.append(exc.result)
+                status = "PARTIAL"
+                error_message = f"Preempted and not resumed: {exc}"
+                LOGGER.info("Tokenization run %s handed %s to another worker: %s", run_id, dataset_urn, exc)
             except Exception as exc:  # pragma: no cover - runtime failure surface
                 status = "FAILED"
                 error_message = str(exc)
                 LOGGER.exception("Tokenization run %s failed", run_id)
             finally:
                 finished_at = datetime.now(timezone.utc)
-                self._finalize(
-                    dataset,
-                    dataset_urn,
+                self.journal.record_finish(
                     run_id,
+                    dataset_urn,
+                    status,
                     selected_columns,
                     results,
-                    status,
+                    (finished_at - started_at).total_seconds(),
                     error_message,
-                    started_at,
-                    finished_at,
                 )
+                proposals: List["Proposal"] = []
+                # A BUSY run never touched the table; the lease holder reports the outcome.
+                if status != "BUSY":
+                    proposals = self._finalize(
+                        dataset,
+                        dataset_urn,
+                        run_id,
+                        selected_columns,
+                        results,
+                        status,
+                        error_message,
+                        started_at,
+                        finished_at,
+                        state=self._next_state(
+                            platform,
+                            dataset_key,
+                            run_id,
+                            selected_columns,
+                            schema_hash,
+                            results,
+                            status,
+                            finished_at,
+                        ),
+                        clear_progress=reporter.checkpointed,
+                    )
+                reporter.finish(status, error_message)
 
             total_updated = sum(result.rows_updated for result in results)
             total_scanned = sum(result.rows_scanned for result in results)
@@ -109,7 +363,264 @@ class RunManager:
                 "duration_seconds": duration_s,
                 "rows_scanned": total_scanned,
                 "rows_updated": total_updated,
-            }
+            }, proposals
+
+    def estimate(
+        self,
+        dataset_urn: str,
+        columns: Optional[Sequence[str]] = None,
+        *,
+        dataset: Optional[dict] = None,
+    ) -> Dict[str, object]:
+        """Report what a run would do without locking rows or writing metadata."""
+
+        if dataset is None:
+            dataset = self.client.get_dataset(dataset_urn)
+        schema_fields = self.client.extract_schema_fields(dataset)
+        selected_columns = self.detector.select(schema_fields, override_columns=columns)
+        platform, dataset_key, _env = _parse_dataset_urn(dataset_urn)
+        database, schema, table = _split_dataset_key(dataset_key)
+
+        estimate: TokenizationEstimate
+        if platform == "postgres":
+            with self._postgres(dataset_key) as pg:
+                estimate = pg.estimate(database=database, schema=schema, table=table, columns=selected_columns)
+        elif platform == "databricks":
+            if not getattr(self.dbx, "enabled", False):
+                raise RuntimeError("Databricks tokenizer not configured")
+            estimate = self.dbx.estimate(catalog=database, schema=schema, table=table, columns=selected_columns)
+        else:
+            raise RuntimeError(f"Unsupported platform: {platform}")
+
+        throughput = self.journal.throughput(dataset_urn) or _previous_throughput(
+            self.client.extract_custom_properties(dataset)
+        )
+        projected_duration = estimate.estimated_rows / throughput if throughput else None
+        LOGGER.info(
+            "Dry run for %s: ~%s rows over %s pages",
+            dataset_urn,
+            estimate.estimated_rows,
+            estimate.pages,
+        )
+        return {
+            "run_id": None,
+            "dataset": dataset_urn,
+            "status": "DRY_RUN",
+            "dry_run": True,
+            "columns": selected_columns,
+            "estimates": [estimate.__dict__],
+            "estimated_rows": estimate.estimated_rows,
+            "estimated_pages": estimate.pages,
+            "throughput_rows_per_second": throughput,
+            "projected_duration_seconds": projected_duration,
+        }
+
+    def _estimated_rows(self, platform: str, dataset_key: str, columns: Sequence[str]) -> Optional[int]:
+        """Planner estimate of rows left to tokenize, used for progress ETAs.
+
+        Only the Postgres ``EXPLAIN`` estimate is used: an exact ``COUNT`` would
+        scan the table outside the run's lane slot and throttles just to show an
+        ETA. Databricks has no planner row estimate, so its runs report none.
+        """
+
+        if platform != "postgres" or not self.pg:
+            return None
+        database, schema, table = _split_dataset_key(dataset_key)
+        try:
+            with self._postgres(dataset_key) as pg:
+                estimate = pg.estimate(database=database, schema=schema, table=table, columns=columns, exact_count=False)
+                return estimate.estimated_rows
+        except Exception as exc:  # pragma: no cover - the run itself reports database errors
+            LOGGER.debug("No row estimate for %s: %s", dataset_key, exc)
+        return None
+
+    def _checkpoint_progress(self, dataset_urn: str, event: dict) -> None:
+        summary = {key: event[key] for key in ("run_id", "rows_scanned", "rows_updated", "last_pk", "eta_seconds")}
+        summary["updated_at"] = datetime.now(timezone.utc).isoformat()
+        self.client.emit_batch(
+            [
+                self.client.custom_properties_proposal(
+                    dataset_urn, set_properties={PROGRESS_PROPERTY: json.dumps(summary, separators=(",", ":"))}
+                )
+            ]
+        )
+
+    def _dataset_lock(self, dataset_urn: str) -> threading.Lock:
+        with self._lock:
+            return self._dataset_locks.setdefault(dataset_urn, threading.Lock())
+
+    def lanes(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Report running and waiting runs per platform and priority lane."""
+
+        return {platform: scheduler.snapshot() for platform, scheduler in self._lanes.items()}
+
+    def _postgres(self, dataset_key: str) -> ContextManager["PostgresTokenizer"]:
+        """Return the tokenizer of the route serving the dataset's database."""
+
+        if not self.pg:
+            raise RuntimeError("Postgres tokenizer not configured")
+        database, _schema, _table = _split_dataset_key(dataset_key)
+        return self.pg.tokenizer(_platform_instance(dataset_key), database)
+
+    def _scheduler(self, platform: str, dataset_key: str) -> Optional[LaneScheduler]:
+        """Return the lane scheduler capping runs against the dataset's database."""
+
+        if platform == "postgres" and self.pg:
+            database, _schema, _table = _split_dataset_key(dataset_key)
+            route = self.pg.route(_platform_instance(dataset_key), database)
+            key, capacity = f"postgres/{route.name}", route.max_concurrency
+        elif platform in self._platform_limits:
+            key, capacity = platform, self._platform_limits[platform]
+        else:
+            return None
+        with self._lock:
+            if key not in self._lanes:
+                self._lanes[key] = LaneScheduler(capacity, self._lane_config)
+            return self._lanes[key]
+
+    def _batch_capacity(self, dataset_urns: Sequence[str]) -> int:
+        """Sum the run caps of the distinct routes a batch touches."""
+
+        capacities: Dict[object, int] = {}
+        for urn in dataset_urns:
+            try:
+                platform, dataset_key, _env = _parse_dataset_urn(urn)
+                scheduler = self._scheduler(platform, dataset_key)
+            except Exception:  # pragma: no cover - the run itself reports the error
+                scheduler = None
+            if scheduler is None:
+                capacities[urn] = 1
+            else:
+                capacities[scheduler] = scheduler.capacity
+        return sum(capacities.values())
+
+    def _tokenize_in_lane(
+        self, platform: str, dataset_key: str, columns: Sequence[str], context: RunContext, lane: str
+    ) -> TokenizationResult:
+        """Tokenize inside a ``lane`` slot, resuming after every preemption until the run ends."""
+
+        segments: List[TokenizationResult] = []
+        while True:
+            scheduler = self._scheduler(platform, dataset_key)
+            try:
+                with scheduler.slot(lane, context) if scheduler is not None else nullcontext():
+                    segments.append(self._tokenize(platform, dataset_key, columns, context))
+            except LeaseUnavailable as exc:
+                if not segments:
+                    raise
+                # Another worker took the table while this run was preempted; it finishes the work.
+                raise _HandedOff(str(exc), _merge_segments(segments)) from exc
+            if not segments[-1].preemptions or context.cancelled:
+                break
+            if segments[-1].last_pk is not None:
+                context.position = segments[-1].last_pk
+            LOGGER.info("Run %s preempted; resuming %s after %s", context.run_id, context.dataset_urn, context.position)
+        return _merge_segments(segments)
+
+    def _tokenize(
+        self, platform: str, dataset_key: str, columns: Sequence[str], context: RunContext
+    ) -> TokenizationResult:
+        database, schema, table = _split_dataset_key(dataset_key)
+        if platform == "postgres":
+            with self._postgres(dataset_key) as pg:
+                return pg.tokenize(database=database, schema=schema, table=table, columns=columns, context=context)
+        if platform == "databricks":
+            if not getattr(self.dbx, "enabled", False):
+                raise RuntimeError("Databricks tokenizer not configured")
+            return self.dbx.tokenize(catalog=database, schema=schema, table=table, columns=columns, context=context)
+        raise RuntimeError(f"Unsupported platform: {platform}")
+
+    def _change_marker(self, platform: str, dataset_key: str) -> Optional[str]:
+        """Return the platform's modification marker for the table, if it can be read."""
+
+        database, schema, table = _split_dataset_key(dataset_key)
+        try:
+            if platform == "postgres" and self.pg:
+                with self._postgres(dataset_key) as pg:
+                    return pg.change_marker(database=database, schema=schema, table=table)
+            if platform == "databricks" and getattr(self.dbx, "enabled", False):
+                return self.dbx.change_marker(catalog=database, schema=schema, table=table)
+        except Exception as exc:  # pragma: no cover - runtime failure surface
+            LOGGER.warning("Unable to read change marker for %s: %s", dataset_key, exc)
+        return None
+
+    def _has_pending(self, platform: str, dataset_key: str, columns: Sequence[str]) -> bool:
+        """Return whether untokenized rows remain; ``True`` when it cannot be checked."""
+
+        database, schema, table = _split_dataset_key(dataset_key)
+        try:
+            if platform == "postgres" and self.pg:
+                with self._postgres(dataset_key) as pg:
+                    return pg.has_pending(database=database, schema=schema, table=table, columns=columns)
+            if platform == "databricks" and getattr(self.dbx, "enabled", False):
+                return self.dbx.has_pending(catalog=database, schema=schema, table=table, columns=columns)
+        except Exception as exc:  # pragma: no cover - runtime failure surface
+            LOGGER.warning("Unable to check pending rows for %s: %s", dataset_key, exc)
+        return True
+
+    def _next_state(
+        self,
+        platform: str,
+        dataset_key: str,
+        run_id: str,
+        columns: Sequence[str],
+        schema_hash: str,
+        results: Sequence[TokenizationResult],
+        status: str,
+        finished_at: datetime,
+    ) -> Optional[DatasetState]:
+        """Build the state digest to persist, or ``None`` if the run left work behind.
+
+        The marker is read after the run's own commits, so it covers them, and
+        before a fresh check for untokenized rows: a write committed before the
+        marker is found by the check, a later one moves the marker.
+        """
+
+        if status != "SUCCESS" or not results or not all(result.complete for result in results):
+            return None
+        change_marker = self._change_marker(platform, dataset_key)
+        if change_marker is None:
+            return None
+        if self._has_pending(platform, dataset_key, columns):
+            LOGGER.info("Not recording state for %s: untokenized rows appeared during the run", dataset_key)
+            return None
+        return DatasetState(
+            columns=sorted(columns),
+            schema_hash=schema_hash,
+            change_marker=change_marker,
+            watermark=results[-1].last_pk,
+            run_id=run_id,
+            recorded_at=finished_at.isoformat(),
+        )
+
+    def _skip(
+        self,
+        dataset: dict,
+        dataset_urn: str,
+        columns: Sequence[str],
+        state: DatasetState,
+        started_at: datetime,
+    ) -> Tuple[Dict[str, object], List["Proposal"]]:
+        LOGGER.info("Skipping %s: unchanged since run %s", dataset_urn, state.run_id)
+        proposals: List["Proposal"] = []
+        if RUN_TAG in self.client._extract_tag_urns(dataset.get("globalTags")):
+            proposals.append(self._tags_proposal(dataset, dataset_urn, "SUCCESS"))
+        finished_at = datetime.now(timezone.utc)
+        return {
+            "run_id": None,
+            "dataset": dataset_urn,
+            "status": "SKIPPED",
+            "skipped": True,
+            "error": None,
+            "columns": list(columns),
+            "results": [],
+            "started_at": started_at.isoformat(),
+            "finished_at": finished_at.isoformat(),
+            "duration_seconds": (finished_at - started_at).total_seconds(),
+            "rows_scanned": 0,
+            "rows_updated": 0,
+            "previous_run_id": state.run_id,
+        }, proposals
 
     def _finalize(
         self,
@@ -122,25 +633,39 @@ class RunManager:
         error_message: Optional[str],
         started_at: datetime,
         finished_at: datetime,
-    ) -> None:
+        *,
+        state: Optional[DatasetState] = None,
+        clear_progress: bool = False,
+    ) -> List["Proposal"]:
         documentation = self._build_documentation(run_id, status, columns, results, started_at, finished_at, error_message)
-        custom_properties = self.client.extract_custom_properties(dataset)
+        custom_properties: Dict[str, str] = {}
+        if state is not None:
+            custom_properties[STATE_PROPERTY] = state.to_json()
         custom_properties["last_tokenization_run"] = json.dumps(
             {
                 "run_id": run_id,
-                "dataset": dataset_urn,
                 "status": status,
                 "columns": list(columns),
-                "results": [result.__dict__ for result in results],
+                "rows_scanned": sum(result.rows_scanned for result in results),
+                "rows_updated": sum(result.rows_updated for result in results),
                 "error": error_message,
                 "started_at": started_at.isoformat(),
                 "finished_at": finished_at.isoformat(),
             },
-            indent=2,
+            separators=(",", ":"),
         )
 
-        self.client.update_editable_properties(dataset_urn, documentation, custom_properties)
-        self._update_tags(dataset, dataset_urn, status)
+        existing = self.client.extract_custom_properties(dataset)
+        stale: List[str] = []
+        if state is None and STATE_PROPERTY in existing:
+            stale.append(STATE_PROPERTY)
+        if clear_progress or PROGRESS_PROPERTY in existing:
+            stale.append(PROGRESS_PROPERTY)
+        return [
+            self.client.editable_properties_proposal(dataset_urn, documentation),
+            self.client.custom_properties_proposal(dataset_urn, set_properties=custom_properties, remove=stale),
+            self._tags_proposal(dataset, dataset_urn, status),
+        ]
 
     def _build_documentation(
         self,
@@ -172,25 +697,62 @@ class RunManager:
                     f"  - Rows updated: {result.rows_updated}",
                 ]
             )
+            if result.cells_updated:
+                body.append(f"  - Cells updated: {result.cells_updated}")
+            if result.statement_cache_hits:
+                body.append(f"  - Prepared statement reuses: {result.statement_cache_hits}")
+            if result.preemptions:
+                body.append(f"  - Yielded to higher-priority runs: {result.preemptions}")
+            if result.batch_sizes:
+                sizes = result.batch_sizes
+                body.append(f"  - Batch sizes: {sizes['min']}–{sizes['max']} over {sizes['count']} pages")
             if result.details:
                 body.append(f"  - Details: {result.details}")
         if not results:
             body.append("_No tokenization executed_")
         return "\n".join(body)
 
-    def _update_tags(self, dataset: dict, dataset_urn: str, status: str) -> None:
+    def _tags_proposal(self, dataset: dict, dataset_urn: str, status: str) -> MetadataChangeProposalWrapper:
         current_tags = self.client._extract_tag_urns(dataset.get("globalTags"))
         add_tags = {DONE_TAG, f"{STATUS_PREFIX}{status}"}
         remove_tags: set[str] = {tag for tag in current_tags if tag.startswith(STATUS_PREFIX)}
         if status == "SUCCESS":
             remove_tags.add(RUN_TAG)
-        updated = self.client.update_dataset_tags(
+        proposal, updated = self.client.dataset_tags_proposal(
             dataset_urn,
             add=add_tags,
             remove=remove_tags,
             current_tags=current_tags,
         )
         LOGGER.info("Updated tags for %s: %s", dataset_urn, updated)
+        return proposal
+
+
+class _HandedOff(Exception):
+    """A preempted run could not retake its table lease; ``result`` covers the pages it committed."""
+
+    def __init__(self, message: str, result: TokenizationResult) -> None:
+        super().__init__(message)
+        self.result = result
+
+
+def _build_client() -> "DataHubClient":
+    from .datahub_client import DataHubClient
+
+    return DataHubClient()
+
+
+def _build_pg() -> Optional[PostgresRouter]:
+    router = PostgresRouter.from_env()
+    if router is None:
+        LOGGER.warning("Postgres tokenizer disabled: set PG_CONN_STR or PG_ROUTES")
+    return router
+
+
+def _build_dbx() -> "DatabricksTokenizer":
+    from .db_dbx import DatabricksTokenizer
+
+    return DatabricksTokenizer.from_env()
 
 
 def _parse_dataset_urn(dataset_urn: str) -> tuple[str, str, str]:
@@ -203,12 +765,61 @@ def _parse_dataset_urn(dataset_urn: str) -> tuple[str, str, str]:
         raise ValueError(f"Unable to parse dataset URN {dataset_urn}: {exc}")
 
 
+def _previous_throughput(custom_properties: Dict[str, str]) -> Optional[float]:
+    """Return rows/second scanned by the last recorded run, if any."""
+
+    raw = custom_properties.get("last_tokenization_run")
+    if not raw:
+        return None
+    try:
+        summary = json.loads(raw)
+        started_at = datetime.fromisoformat(summary["started_at"])
+        finished_at = datetime.fromisoformat(summary["finished_at"])
+        rows = int(summary["rows_scanned"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    duration = (finished_at - started_at).total_seconds()
+    if duration <= 0 or rows <= 0:
+        return None
+    return rows / duration
+
+
+def _merge_segments(segments: Sequence[TokenizationResult]) -> TokenizationResult:
+    """Combine the results of a run that was preempted and resumed into one."""
+
+    if len(segments) == 1:
+        return segments[0]
+    last = segments[-1]
+    return TokenizationResult(
+        dataset=last.dataset,
+        platform=last.platform,
+        columns=last.columns,
+        rows_scanned=sum(segment.rows_scanned for segment in segments),
+        rows_updated=sum(segment.rows_updated for segment in segments),
+        details=last.details,
+        last_pk=last.last_pk,
+        complete=last.complete,
+        batch_sizes=merge_batch_summaries(segment.batch_sizes for segment in segments),
+        throttled_seconds=sum(segment.throttled_seconds for segment in segments),
+        cells_updated=sum(segment.cells_updated for segment in segments),
+        statement_cache_hits=sum(segment.statement_cache_hits for segment in segments),
+        preemptions=sum(segment.preemptions for segment in segments),
+    )
+
+
 def _split_dataset_key(key: str) -> tuple[str, str, str]:
+    """Split ``[instance.]database.schema.table`` into database, schema and table."""
+
     parts = key.split(".")
-    if len(parts) == 3:
-        return parts[0], parts[1], parts[2]
+    if len(parts) >= 3:
+        return parts[-3], parts[-2], parts[-1]
     if len(parts) == 2:
         return "", parts[0], parts[1]
-    if len(parts) == 1:
-        return "", "public", parts[0]
-    return parts[0], parts[1], ".".join(parts[2:])
+    return "", "public", parts[0]
+
+
+def _platform_instance(key: str) -> Optional[str]:
+    """Return the platform instance prefixed to a four-part dataset key, if any."""
+
+    parts = key.split(".")
+    return ".".join(parts[:-3]) if len(parts) > 3 else None
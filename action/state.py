@@ -0,0 +1,64 @@
+"""Compact per-dataset tokenization state used to skip no-op runs."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Sequence
+
+LOGGER = logging.getLogger(__name__)
+
+STATE_PROPERTY = "tokenization_state"
+
+
+@dataclass
+class DatasetState:
+    """Digest of the dataset as it looked after the last complete run."""
+
+    columns: List[str]
+    schema_hash: str
+    change_marker: str
+    watermark: Optional[str] = None
+    run_id: Optional[str] = None
+    recorded_at: Optional[str] = None
+
+    def covers(self, columns: Sequence[str], schema_hash: str, change_marker: Optional[str]) -> bool:
+        """Return True when a run for ``columns`` would find nothing to do."""
+
+        if change_marker is None:
+            return False
+        return (
+            self.schema_hash == schema_hash
+            and self.change_marker == change_marker
+            and set(columns).issubset(self.columns)
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), sort_keys=True, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: Optional[str]) -> Optional["DatasetState"]:
+        if not raw:
+            return None
+        try:
+            payload = json.loads(raw)
+            return cls(
+                columns=list(payload["columns"]),
+                schema_hash=str(payload["schema_hash"]),
+                change_marker=str(payload["change_marker"]),
+                watermark=payload.get("watermark"),
+                run_id=payload.get("run_id"),
+                recorded_at=payload.get("recorded_at"),
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            LOGGER.warning("Ignoring unreadable tokenization state: %s", exc)
+            return None
+
+
+def schema_digest(schema_fields: Sequence[dict]) -> str:
+    """Hash the column names and native types of a dataset schema."""
+
+    signature = sorted((item.get("fieldPath") or "", item.get("nativeDataType") or "") for item in schema_fields)
+    encoded = json.dumps(signature, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
@@ -0,0 +1,64 @@
+"""Reuse of prepared statements and generated SQL across pages and runs."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class StatementCache:
+    """Remember statements prepared (or SQL built) per database session.
+
+    ``session`` identifies the connection the statement lives on (the backend
+    pid for Postgres) or is ``None`` for SQL text that does not depend on a
+    session. ``key`` is typically ``(table, column set)``. When
+    ``max_entries`` is set, each session keeps only its most recently used
+    entries.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, "OrderedDict[Hashable, object]"] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session: Hashable, key: Hashable, build: Callable[[], T]) -> Tuple[T, bool]:
+        """Return ``(value, hit)``, calling ``build`` on a miss."""
+
+        with self._lock:
+            entries = self._entries.setdefault(session, OrderedDict())
+            if key in entries:
+                entries.move_to_end(key)
+                self.hits += 1
+                return entries[key], True  # type: ignore[return-value]
+        value = build()
+        with self._lock:
+            entries = self._entries.setdefault(session, OrderedDict())
+            entries[key] = value
+            if self.max_entries is not None and len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self.misses += 1
+        return value, False
+
+    def forget(self, session: Hashable) -> None:
+        """Drop everything cached for ``session``, e.g. after its connection closed."""
+
+        with self._lock:
+            self._entries.pop(session, None)
+
+    def clear(self) -> None:
+        """Drop every session, e.g. after all connections were closed."""
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": sum(len(entries) for entries in self._entries.values()),
+            }
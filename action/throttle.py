@@ -0,0 +1,172 @@
+"""Rate limiting and load-shedding for tokenization against live databases."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that lets callers run into debt.
+
+    Acquiring more tokens than are available drives the balance negative and
+    the caller sleeps until it is paid back, so a single large page is allowed
+    through but the long-run rate never exceeds ``rate`` per second.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Consume ``amount`` tokens, sleeping if needed; return seconds waited."""
+
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+@dataclass
+class HealthSample:
+    replication_lag_seconds: float = 0.0
+    lock_waits: int = 0
+
+
+@dataclass
+class ThrottleConfig:
+    rows_per_second: Optional[float] = None
+    statements_per_second: Optional[float] = None
+    max_replication_lag_seconds: Optional[float] = None
+    max_lock_waits: Optional[int] = None
+    backoff_seconds: float = 1.0
+    max_backoff_seconds: float = 30.0
+    health_check_interval_seconds: float = 5.0
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "ThrottleConfig":
+        """Read ``<prefix>_MAX_ROWS_PER_SECOND`` and friends; unset limits are disabled."""
+
+        def _optional(name: str, cast: Callable[[str], object]) -> Optional[object]:
+            raw = os.getenv(f"{prefix}_{name}")
+            return cast(raw) if raw else None
+
+        return cls(
+            rows_per_second=_optional("MAX_ROWS_PER_SECOND", float),
+            statements_per_second=_optional("MAX_STATEMENTS_PER_SECOND", float),
+            max_replication_lag_seconds=_optional("MAX_REPLICATION_LAG_S", float),
+            max_lock_waits=_optional("MAX_LOCK_WAITS", int),
+            backoff_seconds=float(os.getenv(f"{prefix}_THROTTLE_BACKOFF_S", "1")),
+            max_backoff_seconds=float(os.getenv(f"{prefix}_THROTTLE_MAX_BACKOFF_S", "30")),
+            health_check_interval_seconds=float(os.getenv(f"{prefix}_HEALTH_CHECK_INTERVAL_S", "5")),
+        )
+
+
+class Throttle:
+    """Limits shared by every run against one target database.
+
+    Tokenizers call :meth:`wait_healthy` before opening a page and
+    :meth:`page_done` after committing it, so waits never happen while row
+    locks are held.
+    """
+
+    def __init__(
+        self,
+        config: Optional[ThrottleConfig] = None,
+        *,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.config = config or ThrottleConfig()
+        self._sleep = sleep
+        self._clock = clock
+        self._rows = (
+            TokenBucket(self.config.rows_per_second, clock=clock, sleep=sleep)
+            if self.config.rows_per_second
+            else None
+        )
+        self._statements = (
+            TokenBucket(self.config.statements_per_second, clock=clock, sleep=sleep)
+            if self.config.statements_per_second
+            else None
+        )
+        self._lock = threading.Lock()
+        self._last_sample: Optional[HealthSample] = None
+        self._last_checked = float("-inf")
+
+    @property
+    def checks_health(self) -> bool:
+        return self.config.max_replication_lag_seconds is not None or self.config.max_lock_waits is not None
+
+    def page_done(self, rows: int, statements: int) -> float:
+        """Charge a committed page against the rate limits; return seconds waited."""
+
+        waited = 0.0
+        if self._rows is not None and rows:
+            waited += self._rows.acquire(rows)
+        if self._statements is not None and statements:
+            waited += self._statements.acquire(statements)
+        return waited
+
+    def wait_healthy(self, probe: Callable[[], HealthSample]) -> float:
+        """Back off while ``probe`` reports the target as overloaded; return seconds waited."""
+
+        if not self.checks_health:
+            return 0.0
+        waited = 0.0
+        backoff = self.config.backoff_seconds
+        while True:
+            sample = self._sample(probe)
+            reason = self._overload_reason(sample)
+            if reason is None:
+                return waited
+            LOGGER.warning("Throttling tokenization: %s; backing off %.1fs", reason, backoff)
+            self._sleep(backoff)
+            waited += backoff
+            backoff = min(backoff * 2, self.config.max_backoff_seconds)
+            with self._lock:
+                self._last_checked = float("-inf")
+
+    def _sample(self, probe: Callable[[], HealthSample]) -> HealthSample:
+        with self._lock:
+            now = self._clock()
+            if self._last_sample is not None and now - self._last_checked < self.config.health_check_interval_seconds:
+                return self._last_sample
+        sample = probe()
+        with self._lock:
+            self._last_sample = sample
+            self._last_checked = self._clock()
+        return sample
+
+    def _overload_reason(self, sample: HealthSample) -> Optional[str]:
+        max_lag = self.config.max_replication_lag_seconds
+        if max_lag is not None and sample.replication_lag_seconds > max_lag:
+            return f"replication lag {sample.replication_lag_seconds:.1f}s > {max_lag:.1f}s"
+        max_waits = self.config.max_lock_waits
+        if max_waits is not None and sample.lock_waits > max_waits:
+            return f"{sample.lock_waits} sessions waiting on locks > {max_waits}"
+        return None
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 import base64
 import re
-from typing import Any, Dict, Iterable
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
 
 TOKEN_PREFIX = "tok_"
 TOKEN_SUFFIX = "_poc"
@@ -35,16 +35,90 @@ def tokenize_value(value: Any) -> str:
     return f"{TOKEN_PREFIX}{encoded}{TOKEN_SUFFIX}"
 
 
-def tokenize_row(row: Dict[str, Any], columns: Iterable[str]) -> Dict[str, Any]:
-    """Return a copy of ``row`` with ``columns`` tokenized.
+def detokenize_value(token: str) -> str:
+    """Recover the original string from a token produced by :func:`tokenize_value`.
 
-    Columns not present in ``row`` are ignored. The returned dictionary only
-    contains the updated columns and can be fed directly into a SQL ``UPDATE``
-    statement.
+    Raises ``ValueError`` when ``token`` is not in the token format.
     """
 
-    updates: Dict[str, Any] = {}
-    for column in columns:
-        if column in row:
-            updates[column] = tokenize_value(row[column])
-    return updates
+    if not is_tokenized(token):
+        raise ValueError("value is not a token")
+    encoded = token[len(TOKEN_PREFIX) : -len(TOKEN_SUFFIX)]
+    return base64.b64decode(encoded, validate=True).decode("utf-8")
+
+
+class ColumnSetBuffer:
+    """Reusable per-page buffer of update parameters grouped by changed columns.
+
+    Rows are plain tuples read through precomputed ``column_indexes``. Each row
+    that needs writing is stored once, as a flat parameter list, under a bit
+    mask of the columns it changes. :meth:`clear` only resets the group sizes:
+    the parameter lists of earlier pages are overwritten in place, so a page no
+    larger than the previous ones creates no new parameter lists.
+    """
+
+    __slots__ = ("columns", "column_indexes", "pk_index", "pk_first", "groups", "_sizes", "_names", "_tokens")
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        column_indexes: Sequence[int],
+        pk_index: int,
+        *,
+        pk_first: bool = False,
+    ) -> None:
+        self.columns = tuple(columns)
+        self.column_indexes = tuple(column_indexes)
+        self.pk_index = pk_index
+        self.pk_first = pk_first
+        self.groups: Dict[int, List[List[Any]]] = {}
+        self._sizes: Dict[int, int] = {}
+        self._names: Dict[int, Tuple[str, ...]] = {}
+        self._tokens: List[Any] = [None] * len(self.column_indexes)
+
+    def add(self, row: Sequence[Any]) -> bool:
+        """Queue the changed values of ``row``; return True if anything changed."""
+
+        mask = 0
+        changed = self._tokens
+        count = 0
+        for bit, index in enumerate(self.column_indexes):
+            value = row[index]
+            token = tokenize_value(value)
+            if token != value:
+                mask |= 1 << bit
+                changed[count] = token
+                count += 1
+        if not mask:
+            return False
+        group = self.groups.get(mask)
+        if group is None:
+            group = self.groups[mask] = []
+            self._sizes[mask] = 0
+            self._names[mask] = tuple(column for bit, column in enumerate(self.columns) if mask & (1 << bit))
+        size = self._sizes[mask]
+        if size < len(group):
+            params = group[size]
+        else:
+            params = [None] * (count + 1)
+            group.append(params)
+        self._sizes[mask] = size + 1
+
+        # Copied one by one: slicing would build a new list for every row.
+        offset = 1 if self.pk_first else 0
+        for position in range(count):
+            params[offset + position] = changed[position]
+        params[0 if self.pk_first else count] = row[self.pk_index]
+        return True
+
+    def column_sets(self) -> Iterator[Tuple[Tuple[str, ...], List[List[Any]]]]:
+        """Yield ``(changed columns, parameter rows)`` for every non-empty group of the current page."""
+
+        for mask, group in self.groups.items():
+            size = self._sizes[mask]
+            if size:
+                yield self._names[mask], group if size == len(group) else group[:size]
+
+    def clear(self) -> None:
+        for mask in self._sizes:
+            self._sizes[mask] = 0
@@ -1,8 +1,8 @@
 """Shared dataclasses for the tokenization action."""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -13,3 +13,35 @@ class TokenizationResult:
     rows_scanned: int
     rows_updated: int
     details: Optional[str] = None
+    last_pk: Optional[str] = None
+    complete: bool = True
+    # Page sizes as {"count", "min", "max", "last"}; empty when no page ran.
+    batch_sizes: Dict[str, int] = field(default_factory=dict)
+    throttled_seconds: float = 0.0
+    cells_updated: int = 0
+    statement_cache_hits: int = 0
+    preemptions: int = 0
+
+
+@dataclass
+class TokenizationEstimate:
+    dataset: str
+    platform: str
+    columns: List[str]
+    estimated_rows: int
+    pages: int
+    batch_size: int
+    exact: bool = False
+    details: Optional[str] = None
+
+
+@dataclass
+class PageProgress:
+    dataset: str
+    page: int
+    batch_rows: int
+    rows_scanned: int
+    rows_updated: int
+    last_pk: Optional[str]
+    elapsed_seconds: float
+    batch_size: int = 0
@@ -0,0 +1,91 @@
+"""Ingestion transformer that classifies PII columns before datasets reach DataHub."""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional
+
+from datahub.configuration.common import ConfigModel
+from datahub.emitter.mcp import MetadataChangeProposalWrapper
+from datahub.ingestion.api.common import PipelineContext, RecordEnvelope
+from datahub.ingestion.api.transform import Transformer
+from datahub.metadata.schema_classes import (
+    GlobalTagsClass,
+    MetadataChangeEventClass,
+    SchemaMetadataClass,
+    TagAssociationClass,
+)
+from datahub.specific.dataset import DatasetPatchBuilder
+
+from action.pii_detector import COLUMN_TAG, PIIDetector
+
+RUN_TAG = "urn:li:tag:tokenize/run"
+
+
+class TokenizePIIConfig(ConfigModel):
+    pii_tags: Optional[List[str]] = None
+    name_patterns: Optional[List[str]] = None
+    run_tag: str = RUN_TAG
+    column_tag: str = COLUMN_TAG
+
+
+class TokenizePIITransformer(Transformer):
+    """Run :class:`PIIDetector` on ingested schemas and tag only datasets with PII.
+
+    Every detected column gets ``column_tag`` in ``schemaMetadata`` so the
+    action can read the column list instead of detecting it again, and the
+    dataset gets ``run_tag`` through a tag patch that leaves the status tags
+    written by the action in place. Datasets without PII pass through untouched.
+    """
+
+    def __init__(self, config: TokenizePIIConfig, ctx: PipelineContext) -> None:
+        self.config = config
+        self.ctx = ctx
+        self.detector = PIIDetector(pii_tags=config.pii_tags, name_patterns=config.name_patterns)
+
+    @classmethod
+    def create(cls, config_dict: dict, ctx: PipelineContext) -> "TokenizePIITransformer":
+        return cls(TokenizePIIConfig.parse_obj(config_dict), ctx)
+
+    def transform(self, record_envelopes: Iterable[RecordEnvelope]) -> Iterable[RecordEnvelope]:
+        for envelope in record_envelopes:
+            record = envelope.record
+            urn: Optional[str] = None
+            schemas: List[SchemaMetadataClass] = []
+            if isinstance(record, MetadataChangeEventClass):
+                urn = record.proposedSnapshot.urn
+                schemas = [aspect for aspect in record.proposedSnapshot.aspects if isinstance(aspect, SchemaMetadataClass)]
+            elif isinstance(record, MetadataChangeProposalWrapper) and isinstance(record.aspect, SchemaMetadataClass):
+                urn = record.entityUrn
+                schemas = [record.aspect]
+
+            columns = [column for schema in schemas for column in self._annotate(schema)]
+            yield envelope
+            if urn and urn.startswith("urn:li:dataset:") and columns:
+                for proposal in DatasetPatchBuilder(urn).add_tag(TagAssociationClass(tag=self.config.run_tag)).build():
+                    yield RecordEnvelope(
+                        record=proposal,
+                        metadata={**envelope.metadata, "workunit_id": f"{urn}-tokenize-run-tag"},
+                    )
+
+    def _annotate(self, schema: SchemaMetadataClass) -> List[str]:
+        """Tag the PII fields of ``schema`` in place and return their column names."""
+
+        fields = [
+            {
+                "fieldPath": field.fieldPath,
+                "globalTags": {
+                    "tags": [{"tag": {"urn": tag.tag}} for tag in (field.globalTags.tags if field.globalTags else [])]
+                },
+            }
+            for field in schema.fields
+        ]
+        columns = self.detector.detect(fields)
+        selected = set(columns)
+        for field in schema.fields:
+            if field.fieldPath.split(".")[-1] not in selected:
+                continue
+            global_tags = field.globalTags or GlobalTagsClass(tags=[])
+            if all(tag.tag != self.config.column_tag for tag in global_tags.tags):
+                global_tags.tags.append(TagAssociationClass(tag=self.config.column_tag))
+            field.globalTags = global_tags
+        return columns
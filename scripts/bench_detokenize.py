@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Measure p50/p99 latency of a /detokenize request body of BENCH_TOKENS tokens.
+
+Runs the same code path as the endpoint (cache lookup, decode, NDJSON
+serialization) in-process, once with a cold cache and distinct tokens per
+request and once with a warm cache, and fails when the p99 exceeds
+DETOKENIZE_P99_BUDGET_MS.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+os.environ.setdefault("RUN_JOURNAL_PATH", os.path.join(tempfile.mkdtemp(), "run_journal.sqlite3"))
+
+from action import app as service  # noqa: E402
+from action.detokenize import Detokenizer  # noqa: E402
+from action.token_logic import tokenize_value  # noqa: E402
+
+TOKENS = int(os.environ.get("BENCH_TOKENS", "10000"))
+REQUESTS = int(os.environ.get("BENCH_REQUESTS", "50"))
+BUDGET_MS = float(os.environ.get("DETOKENIZE_P99_BUDGET_MS", "250"))
+
+
+def run(label: str, batches) -> float:
+    timings = []
+    for batch in batches:
+        started = time.perf_counter()
+        body = "".join(service._detokenized_lines(batch))
+        timings.append((time.perf_counter() - started) * 1000.0)
+        assert body.count("\n") == len(batch)
+    timings.sort()
+    p50 = statistics.median(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{label}: {len(batches)} requests x {TOKENS} tokens  p50 {p50:.1f} ms  p99 {p99:.1f} ms")
+    return p99
+
+
+service.detokenizer = Detokenizer(cache_size=0, max_batch=TOKENS)
+cold = [
+    [tokenize_value(f"user{request}-{index}@example.com") for index in range(TOKENS)] for request in range(REQUESTS)
+]
+cold_p99 = run("cold cache", cold)
+
+service.detokenizer = Detokenizer(cache_size=TOKENS, max_batch=TOKENS)
+warm = [cold[0]] * REQUESTS
+run("warm cache (first request primes it)", warm)
+
+if cold_p99 > BUDGET_MS:
+    print(f"p99 {cold_p99:.1f} ms exceeds budget {BUDGET_MS:.0f} ms", file=sys.stderr)
+    sys.exit(1)
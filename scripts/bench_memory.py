@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Compare memory use of dict rows vs tuple rows in the tokenization loop.
+
+Each mode runs in a fresh interpreter over BENCH_ROWS synthetic rows fetched
+in pages of BENCH_PAGE rows:
+
+* ``dict``  - the previous loop: one dict per fetched row (as RealDictCursor
+  returns), an updates dict per row and a new parameter list per update.
+* ``tuple`` - the current loop: tuple rows read through precomputed indexes
+  into a reused ColumnSetBuffer.
+
+Reports peak RSS growth, tracemalloc peak and the number of generation-0
+garbage collections (a proxy for container allocations) per 100k rows.
+"""
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+from action.token_logic import ColumnSetBuffer, tokenize_value  # noqa: E402
+
+ROWS = int(os.environ.get("BENCH_ROWS", "100000"))
+PAGE = int(os.environ.get("BENCH_PAGE", "1000"))
+COLUMNS = ["email", "phone", "city"]
+SELECT_COLUMNS = ["id"] + COLUMNS
+
+
+def fetch_pages():
+    for start in range(0, ROWS, PAGE):
+        yield [
+            (pk, f"user{pk}@example.com", f"555-{pk}", "Pune" if pk % 3 else tokenize_value("Pune"))
+            for pk in range(start, min(start + PAGE, ROWS))
+        ]
+
+
+def run_dict() -> int:
+    updated = 0
+    for page in fetch_pages():
+        rows = [dict(zip(SELECT_COLUMNS, row)) for row in page]
+        groups = {}
+        for row in rows:
+            updates = {column: tokenize_value(row[column]) for column in COLUMNS if column in row}
+            changes = {column: value for column, value in updates.items() if row[column] != value}
+            if changes:
+                groups.setdefault(tuple(changes), []).append(list(changes.values()) + [row["id"]])
+        updated += sum(len(group) for group in groups.values())
+    return updated
+
+
+def run_tuple() -> int:
+    updated = 0
+    buffer = ColumnSetBuffer(COLUMNS, range(1, len(COLUMNS) + 1), 0)
+    for rows in fetch_pages():
+        buffer.clear()
+        for row in rows:
+            buffer.add(row)
+        updated += sum(len(group) for _columns, group in buffer.column_sets())
+    return updated
+
+
+def measure(mode: str) -> dict:
+    run = run_dict if mode == "dict" else run_tuple
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    collections_before = gc.get_stats()[0]["collections"]
+    tracemalloc.start()
+    started = time.perf_counter()
+    updated = run()
+    elapsed = time.perf_counter() - started
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    scale = 100_000 / ROWS
+    return {
+        "mode": mode,
+        "rows_updated": updated,
+        "seconds_per_100k": elapsed * scale,
+        "tracemalloc_peak_kib": peak / 1024,
+        "rss_growth_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss,
+        "gen0_collections_per_100k": (gc.get_stats()[0]["collections"] - collections_before) * scale,
+    }
+
+
+def main() -> None:
+    if len(sys.argv) == 2:
+        print(json.dumps(measure(sys.argv[1])))
+        return
+    results = []
+    for mode in ("dict", "tuple"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), mode], capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output))
+    if results[0]["rows_updated"] != results[1]["rows_updated"]:
+        sys.exit("Modes disagree on the number of updated rows")
+    print(f"{ROWS} rows in pages of {PAGE} (figures per 100k rows; RSS and peaks per run)")
+    print(f"{'mode':<6} {'time s':>8} {'tracemalloc peak KiB':>21} {'RSS growth KiB':>15} {'gen0 GCs':>9}")
+    for result in results:
+        print(
+            f"{result['mode']:<6} {result['seconds_per_100k']:>8.2f} {result['tracemalloc_peak_kib']:>21.0f} "
+            f"{result['rss_growth_kib']:>15} {result['gen0_collections_per_100k']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Throughput and latency of trigger -> tokenize -> write-back against local Postgres.
+
+DataHub GMS and Kafka are replaced by the in-process stand-ins from
+``action.fakes``: BENCH_TABLES tables of BENCH_ROWS rows are created in
+schema ``bench`` of PG_CONN_STR, registered with a fake DataHubGraph, and
+BENCH_EVENTS tag events are fed to MetadataChangeLogConsumer._handle_message
+from BENCH_CONCURRENCY threads. The first event per table tokenizes it;
+later ones exercise the state-digest fast path.
+"""
+import collections
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repo_root)
+
+import psycopg2  # noqa: E402
+
+from action.datahub_client import DataHubClient  # noqa: E402
+from action.db_pg import PostgresTokenizer  # noqa: E402
+from action.fakes import FakeDataHubGraph, fake_dataset, tag_events  # noqa: E402
+from action.mcl_consumer import MetadataChangeLogConsumer  # noqa: E402
+from action.run_journal import RunJournal  # noqa: E402
+from action.run_manager import RunManager  # noqa: E402
+
+TABLES = int(os.environ.get("BENCH_TABLES", "20"))
+ROWS = int(os.environ.get("BENCH_ROWS", "1000"))
+EVENTS = int(os.environ.get("BENCH_EVENTS", "2000"))
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", "8"))
+
+
+class RecordingRunManager(RunManager):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.statuses = collections.Counter()
+
+    def trigger(self, *args, **kwargs):
+        response = super().trigger(*args, **kwargs)
+        self.statuses[response.get("status")] += 1
+        return response
+
+
+def seed(conn_str: str) -> str:
+    with psycopg2.connect(conn_str) as conn, conn.cursor() as cur:
+        cur.execute("DROP SCHEMA IF EXISTS bench CASCADE; CREATE SCHEMA bench")
+        for index in range(TABLES):
+            cur.execute(
+                f"CREATE TABLE bench.customers_{index} (id SERIAL PRIMARY KEY, email TEXT, phone TEXT, city TEXT);"
+                f"INSERT INTO bench.customers_{index} (email, phone, city) "
+                "SELECT format('user%%s@example.com', g), format('555-%%s', g), 'Pune' FROM generate_series(1, %s) g;"
+                f"ANALYZE bench.customers_{index}",
+                [ROWS],
+            )
+        cur.execute("SELECT current_database()")
+        return cur.fetchone()[0]
+
+
+def main() -> None:
+    conn_str = os.environ.get("PG_CONN_STR")
+    if not conn_str:
+        sys.exit("PG_CONN_STR must point at a scratch Postgres database")
+    logging.getLogger("action").setLevel(logging.WARNING)
+    database = seed(conn_str)
+    urns = [
+        f"urn:li:dataset:(urn:li:dataPlatform:postgres,{database}.bench.customers_{index},PROD)"
+        for index in range(TABLES)
+    ]
+    graph = FakeDataHubGraph(fake_dataset(urn, ["id", "email", "phone", "city"]) for urn in urns)
+    manager = RecordingRunManager(
+        client=DataHubClient(graph=graph),
+        pg=PostgresTokenizer.from_env(),
+        journal=RunJournal(os.path.join(tempfile.mkdtemp(), "run_journal.sqlite3")),
+    )
+    consumer = MetadataChangeLogConsumer(manager)
+
+    def handle(event: dict) -> float:
+        started = time.perf_counter()
+        consumer._handle_message(event)
+        return (time.perf_counter() - started) * 1000.0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        latencies = sorted(pool.map(handle, tag_events(urns, EVENTS)))
+    elapsed = time.perf_counter() - started
+    manager.close()
+
+    with psycopg2.connect(conn_str) as conn, conn.cursor() as cur:
+        cur.execute(
+            " UNION ALL ".join(
+                f"SELECT COUNT(*) FROM bench.customers_{index} WHERE email NOT LIKE 'tok\\_%%'" for index in range(TABLES)
+            )
+        )
+        untokenized = sum(row[0] for row in cur.fetchall())
+
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{EVENTS} events over {TABLES} tables x {ROWS} rows with {CONCURRENCY} threads")
+    print(f"  throughput {EVENTS / elapsed:.0f} events/s  p50 {statistics.median(latencies):.1f} ms  p99 {p99:.1f} ms")
+    print(f"  statuses {dict(manager.statuses)}")
+    print(f"  GraphQL reads {graph.graphql_calls}  emit calls {graph.emit_calls}  proposals {len(graph.emitted)}")
+    if untokenized:
+        sys.exit(f"{untokenized} rows were left untokenized")
+
+
+if __name__ == "__main__":
+    main()
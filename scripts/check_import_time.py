@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Fail when importing the action service exceeds its start-up budget.
+
+Runs ``python -X importtime -c "import action.app"`` in a fresh interpreter,
+reports the cumulative import time of ``action.app`` and checks that none of
+the heavy connector packages were loaded eagerly.
+"""
+import os
+import subprocess
+import sys
+
+BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "1000"))
+MODULE = os.environ.get("IMPORT_MODULE", "action.app")
+LAZY_PACKAGES = ("psycopg2", "databricks", "pyarrow", "confluent_kafka", "datahub")
+
+probe = (
+    f"import sys, {MODULE}\n"
+    f"print(','.join(name for name in {LAZY_PACKAGES!r} if name in sys.modules))"
+)
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [repo_root, os.environ.get("PYTHONPATH")])))
+completed = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", probe],
+    capture_output=True,
+    text=True,
+    env=env,
+    cwd=repo_root,
+)
+if completed.returncode != 0:
+    print(completed.stderr, file=sys.stderr)
+    sys.exit(completed.returncode)
+
+cumulative_us = None
+for line in completed.stderr.splitlines():
+    # import time: self [us] | cumulative | imported package
+    if not line.startswith("import time:") or "|" not in line:
+        continue
+    _self_us, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+    if name == MODULE:
+        cumulative_us = int(cumulative)
+
+if cumulative_us is None:
+    print(f"Could not find {MODULE} in -X importtime output", file=sys.stderr)
+    sys.exit(1)
+
+elapsed_ms = cumulative_us / 1000.0
+eager = [name for name in completed.stdout.strip().split(",") if name]
+print(f"import {MODULE}: {elapsed_ms:.1f} ms (budget {BUDGET_MS:.0f} ms)")
+if eager:
+    print(f"Connector packages imported eagerly: {', '.join(eager)}", file=sys.stderr)
+    sys.exit(1)
+if elapsed_ms > BUDGET_MS:
+    print("Import time budget exceeded", file=sys.stderr)
+    sys.exit(1)
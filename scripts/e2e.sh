@@ -5,7 +5,7 @@ DATASET_NAME=${DATASET_NAME:-customers}
 PLATFORM=${PLATFORM:-postgres}
 TIMEOUT=${TIMEOUT:-600}
 
-DATASET_URN=$(python3 scripts/find_dataset_urn.py "$DATASET_NAME" "$PLATFORM" | head -n 1 | cut -f1)
+DATASET_URN=$(printf '%s\n' "$DATASET_NAME" | python3 scripts/resolve_urns.py --platform "$PLATFORM" --exact | head -n 1 | cut -f2)
 if [ -z "$DATASET_URN" ]; then
   echo "Unable to resolve dataset URN" >&2
   exit 1
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Resolve dataset names to URNs in bulk using DataHub's GraphQL search.
+
+Names are read one per line (optionally ``name<TAB>platform``) from the files
+given as arguments, or from stdin. Each name is paged through
+``scrollAcrossEntities`` on RESOLVE_CONCURRENCY worker threads. Every worker
+keeps one persistent HTTP connection to GMS. Results are streamed as
+``name<TAB>urn<TAB>dataset name`` lines as soon as they arrive. Resolved names
+are cached in URN_CACHE_PATH for URN_CACHE_TTL_S seconds, so repeated
+invocations skip GraphQL entirely::
+
+    printf 'customers\\norders\\n' | scripts/resolve_urns.py --exact
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+GMS = os.environ.get("DATAHUB_GMS", "http://localhost:8080").rstrip("/")
+TOKEN = os.environ.get("DATAHUB_TOKEN")
+CACHE_PATH = os.environ.get(
+    "URN_CACHE_PATH",
+    os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "datahub-tokenize", "urns.json"),
+)
+
+SCROLL_QUERY = """
+query resolve($input: ScrollAcrossEntitiesInput!) {
+  scrollAcrossEntities(input: $input) {
+    nextScrollId
+    searchResults {
+      entity {
+        urn
+        ... on Dataset {
+          name
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class GraphQLClient:
+    """POST GraphQL queries over one keep-alive connection per thread."""
+
+    def __init__(self, endpoint: str, token=None, timeout: float = 30.0) -> None:
+        parsed = urllib.parse.urlsplit(endpoint)
+        self.https = parsed.scheme == "https"
+        self.host = parsed.netloc
+        self.path = (parsed.path or "") + "/api/graphql"
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self._local = threading.local()
+
+    def execute(self, query: str, variables: dict) -> dict:
+        body = json.dumps({"query": query, "variables": variables}).encode("utf-8")
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request("POST", self.path, body=body, headers=self.headers)
+                response = conn.getresponse()
+                payload = response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # GMS closed the idle keep-alive connection; reconnect once.
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+                continue
+            if response.status != 200:
+                raise RuntimeError(f"GraphQL request failed with HTTP {response.status}: {payload[:200]!r}")
+            data = json.loads(payload.decode("utf-8"))
+            if data.get("errors"):
+                raise RuntimeError(json.dumps(data["errors"]))
+            return data.get("data") or {}
+        raise AssertionError("unreachable")
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            factory = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = factory(self.host, timeout=self.timeout)
+        return conn
+
+
+class UrnCache:
+    """JSON file of ``key -> {"expires": ts, "matches": [[urn, name], ...]}``."""
+
+    def __init__(self, path: str, ttl: float) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as handle:
+                self._entries = json.load(handle)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry["expires"] < time.time():
+            return None
+        return entry["matches"]
+
+    def put(self, key: str, matches) -> None:
+        with self._lock:
+            self._entries[key] = {"expires": time.time() + self.ttl, "matches": matches}
+
+    def save(self) -> None:
+        now = time.time()
+        with self._lock:
+            entries = {key: entry for key, entry in self._entries.items() if entry["expires"] >= now}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(entries, handle)
+        os.replace(tmp_path, self.path)
+
+
+def search(client: GraphQLClient, name: str, platform: str, *, exact: bool, page_size: int, max_pages: int):
+    """Return ``[[urn, dataset name], ...]`` for ``name`` on ``platform``, following scroll ids."""
+
+    matches = []
+    scroll_id = None
+    for _ in range(max_pages):
+        search_input = {
+            "types": ["DATASET"],
+            "query": name,
+            "count": page_size,
+            "scrollId": scroll_id,
+            "orFilters": [{"and": [{"field": "platform", "values": [f"urn:li:dataPlatform:{platform}"]}]}],
+            "searchFlags": {"skipHighlighting": True, "skipAggregates": True},
+        }
+        page = client.execute(SCROLL_QUERY, {"input": search_input}).get("scrollAcrossEntities") or {}
+        for result in page.get("searchResults") or []:
+            entity = result.get("entity") or {}
+            urn = entity.get("urn")
+            if urn and (not exact or _is_exact(name, urn, entity.get("name"))):
+                matches.append([urn, entity.get("name") or ""])
+        scroll_id = page.get("nextScrollId")
+        if not scroll_id:
+            break
+    return matches
+
+
+def _is_exact(name: str, urn: str, dataset_name) -> bool:
+    # The URN key is the qualified name, e.g. ``tokenize.public.customers``.
+    key = urn.split(",", 2)[1] if urn.count(",") >= 2 else ""
+    return any(candidate == name or candidate.endswith("." + name) for candidate in (key, dataset_name or ""))
+
+
+def read_names(paths, default_platform: str):
+    sources = [open(path, encoding="utf-8") for path in paths] if paths else [sys.stdin]
+    names = {}
+    for source in sources:
+        with source:
+            for line in source:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                name, _, platform = line.partition("\t")
+                names[(name.strip(), platform.strip() or default_platform)] = None
+    return list(names)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="files with one name per line (default: stdin)")
+    parser.add_argument("--platform", default="postgres", help="platform for names without one (default: postgres)")
+    parser.add_argument("--exact", action="store_true", help="only keep datasets whose qualified name ends with the name")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("RESOLVE_CONCURRENCY", "8")))
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--max-pages", type=int, default=10)
+    parser.add_argument("--ttl", type=float, default=float(os.environ.get("URN_CACHE_TTL_S", "3600")))
+    parser.add_argument("--no-cache", action="store_true", help="neither read nor write the local cache")
+    args = parser.parse_args()
+
+    names = read_names(args.files, args.platform)
+    cache = None if args.no_cache else UrnCache(CACHE_PATH, args.ttl)
+    client = GraphQLClient(GMS, TOKEN)
+    unresolved = 0
+    stdout_open = True
+
+    def emit(name: str, matches) -> None:
+        nonlocal unresolved, stdout_open
+        if not matches:
+            unresolved += 1
+            print(f"No matching datasets found for {name}", file=sys.stderr)
+            return
+        if not stdout_open:
+            return
+        try:
+            sys.stdout.write("".join(f"{name}\t{urn}\t{dataset}\n" for urn, dataset in matches))
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader (e.g. ``head -n 1``) is done; keep resolving to fill the cache.
+            stdout_open = False
+            sys.stdout = open(os.devnull, "w")
+
+    def key(name: str, platform: str) -> str:
+        return f"{GMS}\t{platform}\t{name}\t{int(args.exact)}"
+
+    pending = []
+    for name, platform in names:
+        cached = cache.get(key(name, platform)) if cache else None
+        if cached is not None:
+            emit(name, cached)
+        else:
+            pending.append((name, platform))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(args.concurrency, len(pending) or 1))) as pool:
+            futures = {
+                pool.submit(
+                    search, client, name, platform, exact=args.exact, page_size=args.page_size, max_pages=args.max_pages
+                ): (name, platform)
+                for name, platform in pending
+            }
+            for future in as_completed(futures):
+                name, platform = futures[future]
+                try:
+                    matches = future.result()
+                except Exception as exc:
+                    unresolved += 1
+                    print(f"Failed to resolve {name}: {exc}", file=sys.stderr)
+                    continue
+                # Misses are not cached so names ingested a moment later resolve right away.
+                if cache and matches:
+                    cache.put(key(name, platform), matches)
+                emit(name, matches)
+    finally:
+        if cache:
+            cache.save()
+    return 1 if unresolved else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""The Arrow tokenization path must write the same tokens as the row path."""
+from __future__ import annotations
+
+import datetime
+from decimal import Decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from action.db_dbx import _tokenize_arrow_column  # noqa: E402
+from action.token_logic import tokenize_value  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "values, arrow_type",
+    [
+        ([1.0, 2.5, None, -0.0], pa.float64()),
+        ([True, False, None], pa.bool_()),
+        ([datetime.datetime(2024, 1, 2, 3, 4, 5), None], pa.timestamp("us")),
+        ([7, None, 42], pa.int64()),
+        ([Decimal("1.50"), None], pa.decimal128(5, 2)),
+        (["alice@example.com", None, "", tokenize_value("bob@example.com")], pa.string()),
+        (["+1 555 0100", None], pa.large_string()),
+    ],
+)
+def test_arrow_tokens_match_row_path(values, arrow_type):
+    column = pa.chunked_array([pa.array(values[:1], type=arrow_type), pa.array(values[1:], type=arrow_type)])
+
+    tokenized, changed = _tokenize_arrow_column(column)
+
+    expected = [tokenize_value(value) for value in values]
+    assert tokenized.to_pylist() == expected
+    assert changed.to_pylist() == [token != value for token, value in zip(expected, values)]
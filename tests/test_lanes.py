@@ -0,0 +1,169 @@
+"""Slot reservations, priority hand-off and cooperative preemption of priority lanes."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from action.datahub_client import DataHubClient
+from action.fakes import FakeDataHubGraph, fake_dataset
+from action.lanes import BULK, EVENT, INTERACTIVE, LaneConfig, LaneScheduler
+from action.run_context import RunContext
+from action.run_journal import RunJournal
+from action.run_manager import RunManager
+from action.types import PageProgress, TokenizationResult
+
+BACKFILL = "urn:li:dataset:(urn:li:dataPlatform:postgres,tokenize.public.backfill,PROD)"
+LOOKUP = "urn:li:dataset:(urn:li:dataPlatform:postgres,tokenize.public.lookup,PROD)"
+PAGE_SECONDS = 0.05
+
+
+def start_in_thread(scheduler: LaneScheduler, lane: str, context: Optional[RunContext] = None):
+    """Hold a ``lane`` slot on a thread until the returned release event is set."""
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def hold() -> None:
+        with scheduler.slot(lane, context):
+            started.set()
+            release.wait(10)
+
+    thread = threading.Thread(target=hold, daemon=True)
+    thread.start()
+    return started, release, thread
+
+
+def test_bulk_runs_cannot_take_the_interactive_reserved_slot():
+    scheduler = LaneScheduler(2, LaneConfig(reserved={INTERACTIVE: 1, EVENT: 0}, preemption=False))
+    first_started, first_release, first = start_in_thread(scheduler, BULK)
+    assert first_started.wait(5)
+
+    second_started, second_release, second = start_in_thread(scheduler, BULK)
+    assert not second_started.wait(0.2)
+    assert scheduler.snapshot()[BULK] == {"running": 1, "waiting": 1, "limit": 1}
+
+    interactive_started, interactive_release, interactive = start_in_thread(scheduler, INTERACTIVE)
+    assert interactive_started.wait(5)
+
+    # The bulk limit counts every running slot, so the interactive run still blocks it.
+    first_release.set()
+    first.join(5)
+    assert not second_started.wait(0.2)
+    interactive_release.set()
+    assert second_started.wait(5)
+    second_release.set()
+    for thread in (interactive, second):
+        thread.join(5)
+
+
+def test_waiting_interactive_run_preempts_the_bulk_run():
+    scheduler = LaneScheduler(1, LaneConfig(reserved={}, preemption=True))
+    bulk_context = RunContext("bulk-run", BACKFILL)
+    bulk_started, bulk_release, bulk = start_in_thread(scheduler, BULK, bulk_context)
+    assert bulk_started.wait(5)
+
+    interactive_started, interactive_release, interactive = start_in_thread(scheduler, INTERACTIVE, RunContext("i", LOOKUP))
+    deadline = time.monotonic() + 5
+    while not bulk_context.preempted:
+        assert time.monotonic() < deadline, "bulk run was not asked to yield"
+        time.sleep(0.01)
+    assert not interactive_started.is_set()
+
+    # The bulk run yields at its page boundary; the interactive run gets the slot.
+    bulk_release.set()
+    assert interactive_started.wait(5)
+    interactive_release.set()
+    bulk.join(5)
+    interactive.join(5)
+
+
+class PagingTokenizer:
+    """Commit 100-row pages after ``context.position`` and stop when asked to."""
+
+    conn_str = "postgresql://fake/tokenize"
+
+    def __init__(self, pages: Dict[str, int]) -> None:
+        self.pages = pages
+        self.segments: List[Tuple[str, int]] = []
+
+    def tokenize(self, *, database, schema, table, columns, context: RunContext) -> TokenizationResult:
+        page = int(context.position or 0)
+        self.segments.append((table, page))
+        rows = 0
+        preempted = False
+        while page < self.pages[table]:
+            time.sleep(PAGE_SECONDS)
+            page += 1
+            rows += 100
+            context.page_committed(
+                PageProgress(
+                    dataset=table,
+                    page=page,
+                    batch_rows=100,
+                    rows_scanned=rows,
+                    rows_updated=rows,
+                    last_pk=str(page),
+                    elapsed_seconds=0.0,
+                )
+            )
+            if page < self.pages[table] and context.should_stop:
+                preempted = not context.cancelled
+                break
+        return TokenizationResult(
+            dataset=table,
+            platform="postgres",
+            columns=list(columns),
+            rows_scanned=rows,
+            rows_updated=rows,
+            last_pk=str(page),
+            complete=context.resume_after is None and not preempted,
+            preemptions=int(preempted),
+        )
+
+    def estimate(self, **_kwargs):
+        return None
+
+    def change_marker(self, **_kwargs) -> Optional[str]:
+        return None
+
+    def has_pending(self, **_kwargs) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+def test_preempted_run_resumes_after_last_pk_as_one_result(tmp_path, monkeypatch):
+    monkeypatch.setenv("PG_MAX_CONCURRENCY", "1")
+    tokenizer = PagingTokenizer({"backfill": 20, "lookup": 2})
+    manager = RunManager(
+        client=DataHubClient(
+            graph=FakeDataHubGraph([fake_dataset(BACKFILL, ["id", "email"]), fake_dataset(LOOKUP, ["id", "email"])])
+        ),
+        pg=tokenizer,
+        journal=RunJournal(str(tmp_path / "run_journal.sqlite3")),
+    )
+    responses: Dict[str, dict] = {}
+    backfill = threading.Thread(target=lambda: responses.update(bulk=manager.trigger(BACKFILL, lane=BULK)))
+    backfill.start()
+    deadline = time.monotonic() + 5
+    while not manager.progress.active(dataset=BACKFILL):
+        assert time.monotonic() < deadline, "backfill did not start"
+        time.sleep(0.01)
+
+    lookup = manager.trigger(LOOKUP)
+    backfill.join(10)
+    bulk = responses["bulk"]
+
+    assert lookup["status"] == "SUCCESS"
+    assert bulk["status"] == "SUCCESS"
+    (first_table, first_start), (between, _), (resumed_table, resumed_at) = tokenizer.segments
+    assert (first_table, first_start, between, resumed_table) == ("backfill", 0, "lookup", "backfill")
+    assert 0 < resumed_at < 20
+    [result] = bulk["results"]
+    assert result["preemptions"] == 1
+    assert result["complete"] is True
+    assert result["rows_updated"] == bulk["rows_updated"] == 20 * 100
+    assert result["last_pk"] == "20"
+    manager.close()
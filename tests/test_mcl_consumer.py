@@ -0,0 +1,152 @@
+"""Offset handling of MetadataChangeLogConsumer around shutdown."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import List, Optional
+
+from confluent_kafka import TopicPartition
+
+from action.mcl_consumer import TARGET_TAG, TOPIC, MetadataChangeLogConsumer
+
+URN = "urn:li:dataset:(urn:li:dataPlatform:postgres,tokenize.public.customers,PROD)"
+DBX_URN = "urn:li:dataset:(urn:li:dataPlatform:databricks,main.sales.customers,PROD)"
+
+
+class FakeMessage:
+    def __init__(self, partition: int, offset: int, urn: str = URN) -> None:
+        self._partition = partition
+        self._offset = offset
+        self._urn = urn
+
+    def topic(self) -> str:
+        return TOPIC
+
+    def partition(self) -> int:
+        return self._partition
+
+    def offset(self) -> int:
+        return self._offset
+
+    def error(self) -> None:
+        return None
+
+    def value(self) -> dict:
+        return {
+            "entityType": "dataset",
+            "entityUrn": self._urn,
+            "aspectName": "globalTags",
+            "changeType": "UPSERT",
+            "aspect": {"value": json.dumps({"tags": [{"tag": TARGET_TAG}]}), "contentType": "application/json"},
+        }
+
+
+class FakeKafkaConsumer:
+    """Records stored offsets; ``close`` revokes every partition like librdkafka does."""
+
+    def __init__(self) -> None:
+        self.owner: Optional[MetadataChangeLogConsumer] = None
+        self.stored: List[int] = []
+        self.assigned: List[TopicPartition] = []
+
+    def store_offsets(self, message: FakeMessage) -> None:
+        self.stored.append(message.offset())
+
+    def pause(self, partitions: list) -> None:
+        self.assigned.extend(partitions)
+
+    def resume(self, partitions: list) -> None:
+        pass
+
+    def commit(self, asynchronous: bool = True) -> None:
+        pass
+
+    def close(self) -> None:
+        self.owner._on_revoke(self, self.assigned)
+
+
+class BlockingRunManager:
+    """``trigger`` runs until its cancel event is set, then reports CANCELLED.
+
+    ``stop_seconds`` is how long the run takes to reach its next page boundary.
+    """
+
+    def __init__(self, stop_seconds: float = 0.0) -> None:
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.stop_seconds = stop_seconds
+
+    def trigger(self, dataset_urn: str, *, columns=None, cancel_event=None, lane=None) -> dict:
+        self.started.set()
+        while not (cancel_event.is_set() or self.release.is_set()):
+            cancel_event.wait(0.01)
+        time.sleep(self.stop_seconds)
+        return {"run_id": "run", "status": "CANCELLED" if cancel_event.is_set() else "SUCCESS"}
+
+
+def make_consumer(run_manager: BlockingRunManager, revoke_timeout: float = 5) -> MetadataChangeLogConsumer:
+    consumer = MetadataChangeLogConsumer(run_manager, max_in_flight=2, revoke_timeout=revoke_timeout)
+    kafka = FakeKafkaConsumer()
+    kafka.owner = consumer
+    consumer._consumer = kafka
+    return consumer
+
+
+def test_shutdown_does_not_store_offsets_of_cancelled_runs():
+    run_manager = BlockingRunManager()
+    consumer = make_consumer(run_manager)
+    kafka = consumer._consumer
+
+    consumer._dispatch(FakeMessage(partition=0, offset=42))
+    assert run_manager.started.wait(5)
+    consumer._shutdown()
+
+    assert kafka.stored == []
+    assert consumer._in_flight == {}
+
+
+def test_shutdown_stores_offsets_of_finished_runs():
+    run_manager = BlockingRunManager()
+    consumer = make_consumer(run_manager)
+    kafka = consumer._consumer
+
+    consumer._dispatch(FakeMessage(partition=0, offset=7))
+    run_manager.release.set()
+    entry = consumer._in_flight[(TOPIC, 0)]
+    entry.future.result(timeout=5)
+    consumer._shutdown()
+
+    assert kafka.stored == [7]
+    assert not entry.cancel_event.is_set()
+
+
+def test_revoke_waits_for_cancelled_databricks_run_past_timeout():
+    run_manager = BlockingRunManager(stop_seconds=0.3)
+    consumer = make_consumer(run_manager, revoke_timeout=0.05)
+    kafka = consumer._consumer
+
+    consumer._dispatch(FakeMessage(partition=3, offset=9, urn=DBX_URN))
+    entry = consumer._in_flight[(TOPIC, 3)]
+    assert run_manager.started.wait(5)
+    consumer._on_revoke(kafka, [TopicPartition(TOPIC, 3)])
+
+    # Without a table lease the partition is only given up once the run has stopped.
+    assert entry.future.done()
+    assert kafka.stored == []
+
+
+def test_revoke_hands_over_leased_postgres_run_after_timeout():
+    run_manager = BlockingRunManager(stop_seconds=0.3)
+    consumer = make_consumer(run_manager, revoke_timeout=0.05)
+    kafka = consumer._consumer
+
+    consumer._dispatch(FakeMessage(partition=3, offset=9))
+    entry = consumer._in_flight[(TOPIC, 3)]
+    assert run_manager.started.wait(5)
+    consumer._on_revoke(kafka, [TopicPartition(TOPIC, 3)])
+
+    # The advisory lock keeps the new owner out, so revoke does not block on it.
+    assert not entry.future.done()
+    entry.future.result(timeout=5)
+    assert kafka.stored == []
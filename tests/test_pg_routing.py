@@ -0,0 +1,67 @@
+"""Route resolution of PostgresRouter, without opening any connection."""
+from __future__ import annotations
+
+from typing import List
+
+from action.pg_routing import PostgresRoute, PostgresRouter
+
+
+class RecordingTokenizer:
+    def __init__(self, route: PostgresRoute) -> None:
+        self.route = route
+        self.conn_str = route.conn_str
+
+    def close(self) -> None:
+        pass
+
+
+def make_router(routes) -> PostgresRouter:
+    return PostgresRouter(routes, idle_close_seconds=0, factory=RecordingTokenizer)
+
+
+def test_instance_route_wins_over_bare_database():
+    router = make_router({"srv1.*": "postgresql://srv1/{database}", "sales": "postgresql://srv0/sales"})
+
+    route = router.route("srv1", "sales")
+
+    assert route.name == "srv1.sales"
+    assert route.conn_str == "postgresql://srv1/sales"
+    with router.tokenizer("srv1", "sales") as tokenizer:
+        assert tokenizer.conn_str == "postgresql://srv1/sales"
+
+
+def test_bare_database_serves_datasets_without_instance_route():
+    router = make_router({"srv1.*": "postgresql://srv1/{database}", "sales": "postgresql://srv0/sales"})
+
+    assert router.route(None, "sales").conn_str == "postgresql://srv0/sales"
+    assert router.route("srv2", "sales").conn_str == "postgresql://srv0/sales"
+
+
+def test_route_key_order():
+    routes = {
+        "*": "postgresql://fallback/{database}",
+        "sales": "postgresql://bare/sales",
+        "srv1.*": "postgresql://instance/{database}",
+        "srv1.sales": "postgresql://exact/sales",
+    }
+    resolved: List[str] = []
+    for key in ("srv1.sales", "srv1.*", "sales", "*"):
+        resolved.append(make_router(routes).route("srv1", "sales").conn_str)
+        del routes[key]
+
+    assert resolved == [
+        "postgresql://exact/sales",
+        "postgresql://instance/sales",
+        "postgresql://bare/sales",
+        "postgresql://fallback/sales",
+    ]
+
+
+def test_route_named_default_does_not_share_the_fallback():
+    router = make_router({"default": "postgresql://legacy/default", "*": "postgresql://fallback/tokenize"})
+
+    assert router.route(None, "default").name == "default"
+    assert router.route(None, "orders").name == "*"
+    with router.tokenizer(None, "default") as legacy, router.tokenizer(None, "orders") as fallback:
+        assert legacy is not fallback
+        assert (legacy.conn_str, fallback.conn_str) == ("postgresql://legacy/default", "postgresql://fallback/tokenize")
@@ -0,0 +1,95 @@
+"""SKIP LOCKED claim mode revisits rows that were locked during a pass.
+
+Row locks cannot be faked, so these tests need a scratch database:
+set ``TEST_PG_CONN_STR`` to run them. The table ``tokenize_skip_locked_test``
+is recreated in it.
+"""
+from __future__ import annotations
+
+import os
+import threading
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from action.db_pg import CLAIM_SKIP_LOCKED, PostgresTokenizer  # noqa: E402
+from action.token_logic import tokenize_value  # noqa: E402
+
+CONN_STR = os.getenv("TEST_PG_CONN_STR")
+TABLE = "tokenize_skip_locked_test"
+ROWS = 250
+LOCKED_ID = 150
+
+pytestmark = pytest.mark.skipif(not CONN_STR, reason="TEST_PG_CONN_STR is not set")
+
+
+@pytest.fixture
+def table():
+    with psycopg2.connect(CONN_STR) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cur.execute(f"CREATE TABLE {TABLE} (id SERIAL PRIMARY KEY, email TEXT)")
+        cur.execute(
+            f"INSERT INTO {TABLE} (email) SELECT format('user%%s@example.com', g) FROM generate_series(1, %s) g",
+            [ROWS],
+        )
+    yield
+    with psycopg2.connect(CONN_STR) as conn, conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+@pytest.fixture
+def row_lock(table):
+    """Hold ``FOR UPDATE`` on one row from an application transaction until released."""
+
+    conn = psycopg2.connect(CONN_STR)
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT id FROM {TABLE} WHERE id = %s FOR UPDATE", [LOCKED_ID])
+    yield conn.rollback
+    conn.close()
+
+
+def make_tokenizer(passes: int, delay: float) -> PostgresTokenizer:
+    return PostgresTokenizer(
+        CONN_STR, limit=100, claim_mode=CLAIM_SKIP_LOCKED, revisit_passes=passes, revisit_delay_seconds=delay
+    )
+
+
+def emails() -> dict:
+    with psycopg2.connect(CONN_STR) as conn, conn.cursor() as cur:
+        cur.execute(f"SELECT id, email FROM {TABLE}")
+        return dict(cur.fetchall())
+
+
+def tokenize(tokenizer: PostgresTokenizer):
+    try:
+        return tokenizer.tokenize(database="test", schema="public", table=TABLE, columns=["email"])
+    finally:
+        tokenizer.close()
+
+
+def test_row_released_during_a_revisit_delay_is_tokenized(row_lock):
+    release = threading.Timer(0.3, row_lock)
+    release.start()
+
+    result = tokenize(make_tokenizer(passes=3, delay=0.5))
+    release.join()
+
+    assert result.complete
+    assert result.rows_updated == ROWS
+    assert emails()[LOCKED_ID] == tokenize_value(f"user{LOCKED_ID}@example.com")
+
+
+def test_row_locked_through_every_pass_is_left_for_the_next_run(row_lock):
+    result = tokenize(make_tokenizer(passes=2, delay=0.05))
+
+    assert not result.complete
+    assert result.rows_updated == ROWS - 1
+    assert "still locked" in result.details
+    remaining = emails()
+    assert remaining[LOCKED_ID] == f"user{LOCKED_ID}@example.com"
+    assert all(value == tokenize_value(f"user{key}@example.com") for key, value in remaining.items() if key != LOCKED_ID)
+
+    row_lock()
+    retry = tokenize(make_tokenizer(passes=0, delay=0))
+    assert retry.complete and retry.rows_updated == 1
@@ -0,0 +1,168 @@
+"""Progress must stream over SSE while an API-triggered run is in progress."""
+from __future__ import annotations
+
+import http.client
+import json
+import socket
+import threading
+import time
+from typing import List, Optional, Sequence
+
+import pytest
+import uvicorn
+
+import action.app as app_module
+from action.datahub_client import DataHubClient
+from action.fakes import FakeDataHubGraph, fake_dataset
+from action.run_context import RunContext
+from action.run_journal import RunJournal
+from action.run_manager import RunManager
+from action.types import PageProgress, TokenizationEstimate, TokenizationResult
+
+URN = "urn:li:dataset:(urn:li:dataPlatform:postgres,tokenize.public.customers,PROD)"
+PAGES = 5
+PAGE_SECONDS = 0.3
+
+
+class SlowTokenizer:
+    """Commit ``PAGES`` pages of 100 rows, ``PAGE_SECONDS`` apart."""
+
+    conn_str = "postgresql://fake/tokenize"
+
+    def __init__(self) -> None:
+        self.estimate_calls: List[dict] = []
+
+    def tokenize(
+        self,
+        *,
+        database: str,
+        schema: str,
+        table: str,
+        columns: Sequence[str],
+        context: Optional[RunContext] = None,
+    ) -> TokenizationResult:
+        started = time.monotonic()
+        for page in range(1, PAGES + 1):
+            time.sleep(PAGE_SECONDS)
+            context.page_committed(
+                PageProgress(
+                    dataset=table,
+                    page=page,
+                    batch_rows=100,
+                    rows_scanned=page * 100,
+                    rows_updated=page * 100,
+                    last_pk=str(page * 100),
+                    elapsed_seconds=time.monotonic() - started,
+                )
+            )
+        return TokenizationResult(
+            dataset=table,
+            platform="postgres",
+            columns=list(columns),
+            rows_scanned=PAGES * 100,
+            rows_updated=PAGES * 100,
+            last_pk=str(PAGES * 100),
+        )
+
+    def estimate(self, *, database: str, schema: str, table: str, columns: Sequence[str], **kwargs) -> TokenizationEstimate:
+        self.estimate_calls.append(kwargs)
+        return TokenizationEstimate(
+            dataset=table, platform="postgres", columns=list(columns), estimated_rows=PAGES * 100, pages=PAGES, batch_size=100
+        )
+
+    def change_marker(self, **_kwargs) -> Optional[str]:
+        return None
+
+    def has_pending(self, **_kwargs) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+class IdleConsumer:
+    connected = False
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        pass
+
+    def is_alive(self) -> bool:
+        return False
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    tokenizer = SlowTokenizer()
+    manager = RunManager(
+        client=DataHubClient(graph=FakeDataHubGraph([fake_dataset(URN, ["id", "email", "phone"])])),
+        pg=tokenizer,
+        journal=RunJournal(str(tmp_path / "run_journal.sqlite3")),
+    )
+    monkeypatch.setattr(app_module, "run_manager", manager)
+    monkeypatch.setattr(app_module, "consumer", IdleConsumer())
+    monkeypatch.setattr(app_module, "SSE_POLL_SECONDS", 0.02)
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    uvicorn_server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=uvicorn_server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not uvicorn_server.started:
+        assert time.monotonic() < deadline, "server did not start"
+        time.sleep(0.02)
+    yield port, tokenizer
+    uvicorn_server.should_exit = True
+    thread.join(timeout=10)
+    manager.close()
+
+
+def test_progress_streams_while_trigger_runs(server):
+    port, tokenizer = server
+    events: List[tuple] = []
+    subscribed = threading.Event()
+
+    def follow() -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        conn.request("GET", f"/progress/stream?dataset={URN}")
+        response = conn.getresponse()
+        subscribed.set()
+        while True:
+            line = response.fp.readline().decode("utf-8")
+            if not line:
+                return
+            if line.startswith("data: "):
+                event = json.loads(line[len("data: ") :])
+                events.append((time.monotonic(), event))
+                if event.get("final"):
+                    conn.close()
+                    return
+
+    reader = threading.Thread(target=follow, daemon=True)
+    reader.start()
+    assert subscribed.wait(10)
+    time.sleep(0.1)
+
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("POST", "/trigger", body=json.dumps({"dataset": URN}), headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    result = json.loads(response.read())
+    responded_at = time.monotonic()
+    reader.join(timeout=10)
+
+    assert response.status == 200
+    assert result["status"] == "SUCCESS"
+    running = [(at, event) for at, event in events if not event.get("final")]
+    assert [event["page"] for _at, event in running] == list(range(1, PAGES + 1))
+    # Pages arrive while /trigger is still in progress, not all at once when it returns.
+    assert sum(1 for at, _event in running if at < responded_at - PAGE_SECONDS) >= PAGES - 2
+    assert events[-1][1]["final"] and events[-1][1]["status"] == "SUCCESS"
+    # Progress ETAs use the planner estimate only, never an exact COUNT.
+    assert tokenizer.estimate_calls == [{"exact_count": False}]
@@ -0,0 +1,158 @@
+"""Resume points and throughput derived from the append-only run journal."""
+from __future__ import annotations
+
+import threading
+from typing import List, Optional
+
+import pytest
+
+from action.datahub_client import DataHubClient
+from action.fakes import FakeDataHubGraph, fake_dataset
+from action.run_context import RunContext
+from action.run_journal import RunJournal
+from action.run_manager import RunManager
+from action.types import PageProgress, TokenizationResult
+
+URN = "urn:li:dataset:(urn:li:dataPlatform:postgres,tokenize.public.customers,PROD)"
+COLUMNS = ["email", "phone"]
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = RunJournal(str(tmp_path / "run_journal.sqlite3"))
+    yield journal
+    journal.close()
+
+
+def page(number: int, rows: int = 100) -> PageProgress:
+    return PageProgress(
+        dataset="customers",
+        page=number,
+        batch_rows=rows,
+        rows_scanned=number * rows,
+        rows_updated=number * rows,
+        last_pk=str(number * rows),
+        elapsed_seconds=float(number),
+    )
+
+
+def result(rows: int, last_pk: Optional[str] = None) -> TokenizationResult:
+    return TokenizationResult(
+        dataset="customers", platform="postgres", columns=COLUMNS, rows_scanned=rows, rows_updated=rows, last_pk=last_pk
+    )
+
+
+def interrupted_run(journal: RunJournal, run_id: str, pages: int, *, status: Optional[str] = None, columns=COLUMNS):
+    journal.record_start(run_id, URN, columns)
+    for number in range(1, pages + 1):
+        journal.record_checkpoint(run_id, URN, page(number))
+    if status is not None:
+        journal.record_finish(run_id, URN, status, columns, [result(pages * 100, str(pages * 100))], float(pages))
+
+
+def test_no_resume_point_without_runs(journal):
+    assert journal.resume_point(URN, COLUMNS) is None
+
+
+def test_unfinished_run_resumes_after_its_last_checkpoint(journal):
+    interrupted_run(journal, "crashed", pages=3)
+
+    assert journal.resume_point(URN, COLUMNS) == "300"
+    # Column order does not matter, a different column set does.
+    assert journal.resume_point(URN, list(reversed(COLUMNS))) == "300"
+    assert journal.resume_point(URN, ["email"]) is None
+
+
+def test_cancelled_run_resumes_but_successful_run_does_not(journal):
+    interrupted_run(journal, "cancelled", pages=2, status="CANCELLED")
+    assert journal.resume_point(URN, COLUMNS) == "200"
+
+    interrupted_run(journal, "done", pages=4, status="SUCCESS")
+    assert journal.resume_point(URN, COLUMNS) is None
+
+
+def test_resumed_run_without_checkpoints_keeps_the_resume_point(journal):
+    interrupted_run(journal, "first", pages=2, status="CANCELLED")
+    journal.record_start("second", URN, COLUMNS, resume_after="200")
+
+    assert journal.resume_point(URN, COLUMNS) == "200"
+
+
+def test_throughput_averages_recent_successful_runs(journal):
+    assert journal.throughput(URN) is None
+
+    journal.record_start("a", URN, COLUMNS)
+    journal.record_finish("a", URN, "SUCCESS", COLUMNS, [result(1000)], 10.0)
+    journal.record_start("b", URN, COLUMNS)
+    journal.record_finish("b", URN, "FAILED", COLUMNS, [result(5)], 100.0)
+    journal.record_start("c", URN, COLUMNS)
+    journal.record_finish("c", URN, "SUCCESS", COLUMNS, [result(3000)], 10.0)
+    journal.record_start("d", URN, COLUMNS)
+    journal.record_finish("d", URN, "SUCCESS", COLUMNS, [result(0)], 5.0)
+
+    assert journal.throughput(URN) == pytest.approx(4000 / 20)
+    assert journal.throughput(URN, window=1) == pytest.approx(300)
+
+
+class CancellableTokenizer:
+    """Commit 100-row pages after ``context.position``; ``cancel_at`` cancels the run after that page."""
+
+    conn_str = "postgresql://fake/tokenize"
+
+    def __init__(self, pages: int, cancel_at: Optional[int] = None) -> None:
+        self.pages = pages
+        self.cancel_at = cancel_at
+        self.resumed_after: List[Optional[str]] = []
+
+    def tokenize(self, *, database, schema, table, columns, context: RunContext) -> TokenizationResult:
+        self.resumed_after.append(context.resume_after)
+        number = int(context.position or 0) // 100
+        start = number
+        while number < self.pages:
+            number += 1
+            context.page_committed(page(number))
+            if number == self.cancel_at:
+                context.cancel_event.set()
+            if context.should_stop:
+                break
+        rows = (number - start) * 100
+        return TokenizationResult(
+            dataset=table,
+            platform="postgres",
+            columns=list(columns),
+            rows_scanned=rows,
+            rows_updated=rows,
+            last_pk=str(number * 100),
+            complete=context.resume_after is None and number == self.pages,
+        )
+
+    def estimate(self, **_kwargs):
+        return None
+
+    def change_marker(self, **_kwargs) -> Optional[str]:
+        return None
+
+    def has_pending(self, **_kwargs) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+def test_cancelled_run_is_resumed_by_the_next_trigger(journal):
+    tokenizer = CancellableTokenizer(pages=5, cancel_at=1)
+    manager = RunManager(
+        client=DataHubClient(graph=FakeDataHubGraph([fake_dataset(URN, ["id", *COLUMNS])])),
+        pg=tokenizer,
+        journal=journal,
+    )
+
+    first = manager.trigger(URN, cancel_event=threading.Event())
+    tokenizer.cancel_at = None
+    second = manager.trigger(URN)
+
+    assert first["status"] == "CANCELLED"
+    assert tokenizer.resumed_after == [None, "100"]
+    assert second["status"] == "SUCCESS"
+    assert first["rows_updated"] + second["rows_updated"] == 500
+    assert journal.run_status(second["run_id"])["resumed_after"] == "100"
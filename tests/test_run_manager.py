@@ -0,0 +1,106 @@
+"""RunManager outcomes for runs that are preempted, resumed or handed off."""
+from __future__ import annotations
+
+from typing import Callable, List, Optional, Sequence
+
+import pytest
+
+from action.datahub_client import DataHubClient
+from action.fakes import FakeDataHubGraph, fake_dataset
+from action.run_context import LeaseUnavailable, RunContext
+from action.run_journal import RunJournal
+from action.run_manager import DONE_TAG, RUN_TAG, RunManager
+from action.types import TokenizationResult
+
+URN = "urn:li:dataset:(urn:li:dataPlatform:postgres,tokenize.public.customers,PROD)"
+
+Segment = Callable[[RunContext], TokenizationResult]
+
+
+class ScriptedTokenizer:
+    """Play one scripted segment per ``tokenize`` call and record where each started."""
+
+    conn_str = "postgresql://fake/tokenize"
+
+    def __init__(self, segments: Sequence[Segment]) -> None:
+        self.segments = list(segments)
+        self.positions: List[Optional[str]] = []
+
+    def tokenize(self, *, database, schema, table, columns, context: RunContext) -> TokenizationResult:
+        self.positions.append(context.position)
+        return self.segments.pop(0)(context)
+
+    def estimate(self, **_kwargs):
+        return None
+
+    def change_marker(self, **_kwargs) -> Optional[str]:
+        return None
+
+    def has_pending(self, **_kwargs) -> bool:
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+def segment(rows: int, last_pk: str, *, preempted: bool = False) -> Segment:
+    def run(context: RunContext) -> TokenizationResult:
+        return TokenizationResult(
+            dataset="customers",
+            platform="postgres",
+            columns=["email"],
+            rows_scanned=rows,
+            rows_updated=rows,
+            last_pk=last_pk,
+            complete=context.resume_after is None and not preempted,
+            preemptions=int(preempted),
+        )
+
+    return run
+
+
+def lease_taken(_context: RunContext) -> TokenizationResult:
+    raise LeaseUnavailable("public.customers is being tokenized by another worker")
+
+
+@pytest.fixture
+def graph():
+    return FakeDataHubGraph([fake_dataset(URN, ["id", "email"])])
+
+
+def make_manager(graph: FakeDataHubGraph, tokenizer: ScriptedTokenizer, tmp_path) -> RunManager:
+    return RunManager(
+        client=DataHubClient(graph=graph),
+        pg=tokenizer,
+        journal=RunJournal(str(tmp_path / "run_journal.sqlite3")),
+    )
+
+
+def tags(graph: FakeDataHubGraph) -> set:
+    return {item["tag"]["urn"] for item in graph.dataset(URN)["globalTags"]["tags"]}
+
+
+def test_preempted_run_that_loses_its_lease_is_partial(graph, tmp_path):
+    tokenizer = ScriptedTokenizer([segment(100, "100", preempted=True), lease_taken])
+    manager = make_manager(graph, tokenizer, tmp_path)
+
+    response = manager.trigger(URN)
+
+    assert response["status"] == "PARTIAL"
+    assert response["rows_updated"] == 100
+    assert "another worker" in response["error"]
+    assert tokenizer.positions == [None, "100"]
+    assert RUN_TAG in tags(graph) and DONE_TAG in tags(graph)
+    # The journal keeps the checkpoint, so a later run resumes instead of starting over.
+    assert manager.journal.run_status(response["run_id"])["status"] == "PARTIAL"
+    manager.close()
+
+
+def test_run_that_never_gets_the_lease_is_busy(graph, tmp_path):
+    manager = make_manager(graph, ScriptedTokenizer([lease_taken]), tmp_path)
+
+    response = manager.trigger(URN)
+
+    assert response["status"] == "BUSY"
+    assert tags(graph) == {RUN_TAG}
+    manager.close()
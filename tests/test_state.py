@@ -0,0 +1,106 @@
+"""The state digest lets a trigger right after a complete run skip the table."""
+from __future__ import annotations
+
+from typing import List, Optional
+
+from action.datahub_client import DataHubClient
+from action.fakes import FakeDataHubGraph, fake_dataset
+from action.run_context import RunContext
+from action.run_journal import RunJournal
+from action.run_manager import RunManager
+from action.types import TokenizationResult
+
+URN = "urn:li:dataset:(urn:li:dataPlatform:postgres,tokenize.public.customers,PROD)"
+
+
+class CountingTokenizer:
+    """Tokenize ``rows`` raw rows; the change marker counts every write, the run's own included."""
+
+    conn_str = "postgresql://fake/tokenize"
+
+    def __init__(self, rows: int) -> None:
+        self.raw_rows = rows
+        self.writes = rows
+        self.runs = 0
+        self.during_run: List = []
+
+    def tokenize(self, *, database, schema, table, columns, context: RunContext) -> TokenizationResult:
+        self.runs += 1
+        updated = self.raw_rows
+        self.raw_rows = 0
+        self.writes += updated
+        for write in self.during_run:
+            write()
+        self.during_run = []
+        return TokenizationResult(
+            dataset=table,
+            platform="postgres",
+            columns=list(columns),
+            rows_scanned=updated,
+            rows_updated=updated,
+            last_pk=str(updated),
+        )
+
+    def insert_raw_row(self) -> None:
+        self.raw_rows += 1
+        self.writes += 1
+
+    def estimate(self, **_kwargs):
+        return None
+
+    def change_marker(self, **_kwargs) -> Optional[str]:
+        return str(self.writes)
+
+    def has_pending(self, **_kwargs) -> bool:
+        return self.raw_rows > 0
+
+    def close(self) -> None:
+        pass
+
+
+def make_manager(tokenizer: CountingTokenizer, tmp_path) -> RunManager:
+    return RunManager(
+        client=DataHubClient(graph=FakeDataHubGraph([fake_dataset(URN, ["id", "email"])])),
+        pg=tokenizer,
+        journal=RunJournal(str(tmp_path / "run_journal.sqlite3")),
+    )
+
+
+def test_trigger_right_after_a_run_is_skipped(tmp_path):
+    tokenizer = CountingTokenizer(rows=500)
+    manager = make_manager(tokenizer, tmp_path)
+
+    first = manager.trigger(URN)
+    second = manager.trigger(URN)
+
+    assert first["status"] == "SUCCESS" and first["rows_updated"] == 500
+    assert second["status"] == "SKIPPED"
+    assert second["previous_run_id"] == first["run_id"]
+    assert tokenizer.runs == 1
+    manager.close()
+
+
+def test_write_during_the_run_is_not_covered(tmp_path):
+    tokenizer = CountingTokenizer(rows=500)
+    tokenizer.during_run = [tokenizer.insert_raw_row]
+    manager = make_manager(tokenizer, tmp_path)
+
+    manager.trigger(URN)
+    second = manager.trigger(URN)
+    third = manager.trigger(URN)
+
+    assert second["status"] == "SUCCESS" and second["rows_updated"] == 1
+    assert third["status"] == "SKIPPED"
+    manager.close()
+
+
+def test_write_after_the_run_moves_the_marker(tmp_path):
+    tokenizer = CountingTokenizer(rows=500)
+    manager = make_manager(tokenizer, tmp_path)
+
+    manager.trigger(URN)
+    tokenizer.insert_raw_row()
+    second = manager.trigger(URN)
+
+    assert second["status"] == "SUCCESS" and second["rows_updated"] == 1
+    manager.close()
@@ -0,0 +1,110 @@
+"""Token buckets and health back-off of the tokenizer throttle, on a fake clock."""
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+
+from action.throttle import HealthSample, Throttle, ThrottleConfig, TokenBucket
+
+
+class FakeClock:
+    """Monotonic clock that only moves when something sleeps on it."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_bucket_lets_a_burst_through_then_holds_the_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire(10) == 0.0
+    # A page larger than the balance runs into debt and waits until it is paid back.
+    assert bucket.acquire(15) == pytest.approx(1.5)
+    for _ in range(8):
+        bucket.acquire(10)
+
+    assert clock.now == pytest.approx(9.5)
+    assert (10 + 15 + 80) / clock.now == pytest.approx(10 + 10 / 9.5)
+
+
+def test_bucket_refill_is_capped_at_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(10, capacity=20, clock=clock, sleep=clock.sleep)
+    bucket.acquire(20)
+    clock.now += 100
+
+    assert bucket.acquire(25) == pytest.approx(0.5)
+
+
+def test_page_done_charges_rows_and_statements():
+    clock = FakeClock()
+    throttle = Throttle(
+        ThrottleConfig(rows_per_second=100, statements_per_second=2), clock=clock, sleep=clock.sleep
+    )
+
+    assert throttle.page_done(100, 2) == 0.0
+    # The statement bucket refills while the row bucket sleeps: 1 of 3 statements is covered.
+    assert throttle.page_done(50, 3) == pytest.approx(0.5 + 1.0)
+    assert clock.sleeps == [pytest.approx(0.5), pytest.approx(1.0)]
+
+
+def test_no_limits_never_waits_or_probes():
+    throttle = Throttle()
+
+    assert throttle.page_done(10_000, 100) == 0.0
+    assert throttle.wait_healthy(lambda: pytest.fail("probe must not run without health limits")) == 0.0
+
+
+def test_overload_backs_off_exponentially_up_to_the_cap():
+    clock = FakeClock()
+    throttle = Throttle(
+        ThrottleConfig(max_replication_lag_seconds=5, backoff_seconds=1, max_backoff_seconds=3),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    samples = [HealthSample(replication_lag_seconds=lag) for lag in (30, 20, 10, 6, 1)]
+
+    waited = throttle.wait_healthy(lambda: samples.pop(0))
+
+    # Every back-off re-probes, even inside the health-check interval.
+    assert samples == []
+    assert clock.sleeps == [1, 2, 3, 3]
+    assert waited == 9
+
+
+def test_lock_waits_over_the_limit_back_off():
+    clock = FakeClock()
+    throttle = Throttle(ThrottleConfig(max_lock_waits=2), clock=clock, sleep=clock.sleep)
+    samples = [HealthSample(lock_waits=3), HealthSample(lock_waits=2)]
+
+    assert throttle.wait_healthy(lambda: samples.pop(0)) == 1.0
+
+
+def test_healthy_samples_are_reused_within_the_check_interval():
+    clock = FakeClock()
+    throttle = Throttle(
+        ThrottleConfig(max_lock_waits=5, health_check_interval_seconds=5), clock=clock, sleep=clock.sleep
+    )
+    probes: List[float] = []
+
+    def probe() -> HealthSample:
+        probes.append(clock.now)
+        return HealthSample()
+
+    throttle.wait_healthy(probe)
+    clock.now = 4.9
+    throttle.wait_healthy(probe)
+    clock.now = 5.0
+    throttle.wait_healthy(probe)
+
+    assert probes == [0.0, 5.0]
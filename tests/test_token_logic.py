@@ -0,0 +1,61 @@
+"""ColumnSetBuffer grouping and buffer reuse."""
+from __future__ import annotations
+
+from action.token_logic import ColumnSetBuffer, tokenize_value
+
+TOKEN_A = tokenize_value("a@example.com")
+
+
+def test_rows_are_grouped_by_changed_columns():
+    # Rows as read by the Postgres path: (id, email, phone), key last in the parameters.
+    buffer = ColumnSetBuffer(["email", "phone"], [1, 2], 0)
+
+    assert buffer.add((1, "a@example.com", "555-0100")) is True
+    assert buffer.add((2, TOKEN_A, "555-0101")) is True
+    assert buffer.add((3, "c@example.com", None)) is True
+    assert buffer.add((4, TOKEN_A, None)) is False
+    assert buffer.add((5, "e@example.com", "555-0102")) is True
+
+    assert dict(buffer.column_sets()) == {
+        ("email", "phone"): [
+            [tokenize_value("a@example.com"), tokenize_value("555-0100"), 1],
+            [tokenize_value("e@example.com"), tokenize_value("555-0102"), 5],
+        ],
+        ("phone",): [[tokenize_value("555-0101"), 2]],
+        ("email",): [[tokenize_value("c@example.com"), 3]],
+    }
+
+
+def test_key_first_layout():
+    # Rows as read by the Databricks path: the key first, parameters (pk, value, ...).
+    buffer = ColumnSetBuffer(["email", "phone"], [1, 2], 0, pk_first=True)
+
+    buffer.add((7, None, "555-0100"))
+    buffer.add((8, "b@example.com", "555-0101"))
+
+    assert dict(buffer.column_sets()) == {
+        ("phone",): [[7, tokenize_value("555-0100")]],
+        ("email", "phone"): [[8, tokenize_value("b@example.com"), tokenize_value("555-0101")]],
+    }
+
+
+def test_clear_reuses_parameter_lists_without_stale_rows():
+    buffer = ColumnSetBuffer(["email", "phone"], [1, 2], 0)
+    buffer.add((1, "a@example.com", "555-0100"))
+    buffer.add((2, "b@example.com", "555-0101"))
+    buffer.add((3, "c@example.com", None))
+    first_page = {names: [id(params) for params in group] for names, group in buffer.column_sets()}
+
+    buffer.clear()
+    assert list(buffer.column_sets()) == []
+
+    buffer.add((4, "d@example.com", "555-0102"))
+    buffer.add((5, None, "555-0103"))
+    second_page = dict(buffer.column_sets())
+
+    assert second_page == {
+        ("email", "phone"): [[tokenize_value("d@example.com"), tokenize_value("555-0102"), 4]],
+        ("phone",): [[tokenize_value("555-0103"), 5]],
+    }
+    # The smaller page reuses the first list of its group instead of allocating one.
+    assert id(second_page[("email", "phone")][0]) == first_page[("email", "phone")][0]